@@ -80,10 +80,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait on the busy timeout instead of failing to upgrade
+            # a read lock with "database is locked".
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        'TEST': {
+            # A file rather than :memory:, so multi-process tests can share it.
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# MEALPREP_CACHE_BACKEND picks "file" (the default: shared by every worker
+# on the machine, stored under MEALPREP_CACHE_DIR) or "locmem". A locmem
+# cache is per process, so an edit only invalidates the worker that made
+# it; use it only with a single worker.
+
+CACHE_BACKENDS = {
+    "locmem": {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mealprep',
+    },
+    "file": {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("MEALPREP_CACHE_DIR", BASE_DIR / 'cache'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv("MEALPREP_CACHE_BACKEND", "file")],
+}
+
+# Tests run against a private locmem cache, never the site's.
+TEST_RUNNER = 'mealprep_site.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -126,3 +162,27 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEALPREP_GREETING = "Hello Wife!"
+
+# Seconds a cached page or template fragment is kept. Edits invalidate
+# entries immediately, so this only bounds how long dead entries linger.
+MEALPREP_CACHE_TIMEOUT = int(os.getenv("MEALPREP_CACHE_TIMEOUT", "600"))
+
+# Rendered PDFs, named by a digest of their HTML (see planner/pdfstore.py).
+# Filled ahead of time by `manage.py prerenderpdfs`.
+MEALPREP_PDF_DIR = os.getenv("MEALPREP_PDF_DIR", BASE_DIR / 'pdfs')
+
+# Planner logs (e.g. one line per auto-build slot, with timings and pool
+# sizes in the record's "autobuild" attribute) go to the console.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'planner': {
+            'handlers': ['console'],
+            'level': os.getenv("MEALPREP_LOG_LEVEL", "INFO"),
+        },
+    },
+}
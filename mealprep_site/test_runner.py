@@ -0,0 +1,28 @@
+"""
+Test runner that keeps the tests out of the site's cache.
+
+The default cache is a directory shared with the running site, and cache
+keys only depend on version counters and snapshot ids, so pages rendered
+from test data could be served to real visitors. Tests get a private
+locmem cache instead.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mealprep-tests',
+    },
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_override = override_settings(CACHES=TEST_CACHES)
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mealprep_site.settings')
 
 application = get_wsgi_application()
+
+# xhtml2pdf is imported lazily; workers serving PDF exports can opt in to
+# loading it up front instead of on their first download.
+if os.getenv("MEALPREP_PRELOAD_PDF") == "True":
+    from planner.utils import load_pdf_stack
+
+    load_pdf_stack()
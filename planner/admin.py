@@ -1,21 +1,153 @@
 from django.contrib import admin
-from .models import Recipe, Ingredient, MealPlanWeek, PlannedMeal
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from . import archive
+from .caching import bump_version
+from .models import Recipe, Ingredient, MealPlanWeek, PlannedMeal, PlanTemplate, PlanTemplateSlot, PantryItem
+from .views import PantryItemForm
 
 # Register your models here.
 
+#Unfiltered changelists above this many rows show an estimate instead of COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimate_row_count(model, using="default"):
+	"""
+	A cheap row estimate for a table, or None if there is none.
+	SQLite keeps one in sqlite_stat1 once ANALYZE has run; until then the
+	largest primary key, read from the end of the table's b-tree, stands
+	in (an overestimate after deletes). Only SQLite is supported, like the
+	NOCASE search indexes.
+	"""
+	connection = connections[using]
+	if connection.vendor != "sqlite":
+		return None
+	table = connection.ops.quote_name(model._meta.db_table)
+	queries = [
+		("SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [model._meta.db_table]),
+		(f"SELECT MAX(rowid) FROM {table}", []),
+	]
+
+	for sql, params in queries:
+		try:
+			with connection.cursor() as cursor:
+				cursor.execute(sql, params)
+				row = cursor.fetchone()
+		except DatabaseError:
+			continue
+		if row is not None and row[0] is not None and row[0] >= 0:
+			return row[0]
+	return None
+
+
+class EstimatedCountPaginator(Paginator):
+	@cached_property
+	def count(self):
+		qs = self.object_list
+		if isinstance(qs, QuerySet) and not qs.query.where:
+			estimate = estimate_row_count(qs.model, qs.db)
+			if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+				return estimate
+		return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+	list_per_page = 100
+
+
+#Recipes with more ingredients than this link to the ingredient list instead of inlining them
+INGREDIENT_INLINE_LIMIT = 50
+
+
 class IngredientInline(admin.TabularInline):
 	model = Ingredient
 	extra = 1
+	show_change_link = True
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(ScalableAdmin):
 	list_display = ("name", "course_count", "meal_type", "last_used")
+	list_filter = ("meal_type", "course_count")
+	search_fields = ("^name",)
+	actions = ["reset_last_used"]
 	inlines = [IngredientInline]
+	readonly_fields = ("ingredient_list",)
+
+	def get_inlines(self, request, obj):
+		if obj is not None and obj.ingredients.count() > INGREDIENT_INLINE_LIMIT:
+			return []
+		return self.inlines
+
+	@admin.display(description="Ingredients")
+	def ingredient_list(self, obj):
+		if obj is None or obj.pk is None:
+			return "-"
+		url = reverse("admin:planner_ingredient_changelist")
+		return format_html('<a href="{}?recipe__id__exact={}">Open in the ingredient list</a>', url, obj.pk)
+
+	@admin.action(description="Reset last used date")
+	def reset_last_used(self, request, queryset):
+		updated = queryset.update(last_used=None)
+		bump_version("recipe")
+		self.message_user(request, f"Reset {updated} recipe(s).")
+
+@admin.register(Ingredient)
+class IngredientAdmin(ScalableAdmin):
+	list_display = ("name", "amount", "category", "recipe")
+	list_filter = ("category",)
+	list_select_related = ("recipe",)
+	search_fields = ("^name",)
+	autocomplete_fields = ("recipe",)
 
 @admin.register(MealPlanWeek)
-class MealPlanWeekAdmin(admin.ModelAdmin):
-	list_display = ("label", "start_date", "skipped")
+class MealPlanWeekAdmin(ScalableAdmin):
+	list_display = ("label", "start_date", "skipped", "archived")
+	list_filter = ("archived", "skipped")
+	search_fields = ("^label",)
+	# Archiving moves meals to cold storage; only the actions may do it.
+	readonly_fields = ("archived",)
+	actions = ["archive_weeks", "unarchive_weeks"]
+
+	@admin.action(description="Archive selected weeks")
+	def archive_weeks(self, request, queryset):
+		updated = archive.archive_weeks(queryset.values_list("pk", flat=True))
+		self.message_user(request, f"Archived {updated} week(s).")
+
+	@admin.action(description="Unarchive selected weeks")
+	def unarchive_weeks(self, request, queryset):
+		updated = archive.unarchive_weeks(queryset.values_list("pk", flat=True))
+		self.message_user(request, f"Unarchived {updated} week(s).")
 
 @admin.register(PlannedMeal)
-class PlannedMealAdmin(admin.ModelAdmin):
-	list_display = ("week", "slot_name", "recipe")
+class PlannedMealAdmin(ScalableAdmin):
+	list_display = ("week", "slot_name", "recipe", "skipped")
+	list_filter = ("skipped",)
+	list_select_related = ("week", "recipe")
+	search_fields = ("^slot_name", "^recipe__name", "^week__label")
+	autocomplete_fields = ("week", "recipe")
+
+class PlanTemplateSlotInline(admin.TabularInline):
+	model = PlanTemplateSlot
+	extra = 1
+	autocomplete_fields = ("recipe",)
+
+@admin.register(PlanTemplate)
+class PlanTemplateAdmin(admin.ModelAdmin):
+	list_display = ("name", "created_at")
+	search_fields = ("^name",)
+	inlines = [PlanTemplateSlotInline]
+
+@admin.register(PantryItem)
+class PantryItemAdmin(admin.ModelAdmin):
+	form = PantryItemForm
+	list_display = ("name", "category", "quantity")
+	list_filter = ("category",)
+	search_fields = ("^name",)
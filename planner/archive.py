@@ -0,0 +1,97 @@
+"""
+Cold storage for archived weeks.
+
+Archiving a week packs its planned meals into a single ArchivedWeek row and
+deletes them from PlannedMeal, so shopping-list and rotation queries only
+scan live weeks. Unarchiving unpacks them again.
+"""
+import json
+import zlib
+
+from django.db import transaction
+
+from .caching import bump_version
+from .models import ArchivedWeek, MealPlanWeek, PlannedMeal, Recipe
+
+
+def pack_meals(meals):
+    rows = [[m.slot_name, m.recipe_id, m.recipe.name, m.skipped] for m in meals]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode())
+
+
+def unpack_meals(data):
+    """
+    List of {"slot_name", "recipe_id", "recipe_name", "skipped"} dicts.
+    """
+    rows = json.loads(zlib.decompress(bytes(data)))
+    return [
+        {"slot_name": slot_name, "recipe_id": recipe_id, "recipe_name": recipe_name, "skipped": skipped}
+        for slot_name, recipe_id, recipe_name, skipped in rows
+    ]
+
+
+def archive_weeks(week_ids):
+    """
+    Mark weeks archived and move their meals to cold storage.
+    Weeks already in cold storage are left alone. Returns the number of
+    weeks compacted.
+    """
+    with transaction.atomic():
+        week_ids = list(
+            MealPlanWeek.objects.filter(pk__in=week_ids, cold_storage__isnull=True)
+            .values_list("pk", flat=True)
+        )
+
+        meals_by_week = {pk: [] for pk in week_ids}
+        meals = (
+            PlannedMeal.objects.filter(week_id__in=week_ids)
+            .select_related("recipe")
+            .order_by("slot_name", "id")
+        )
+        for meal in meals:
+            meals_by_week[meal.week_id].append(meal)
+
+        ArchivedWeek.objects.bulk_create(
+            ArchivedWeek(week_id=pk, meal_count=len(week_meals), data=pack_meals(week_meals))
+            for pk, week_meals in meals_by_week.items()
+        )
+        PlannedMeal.objects.filter(week_id__in=week_ids).delete()
+        MealPlanWeek.objects.filter(pk__in=week_ids).update(archived=True)
+
+        # update() sends no signals.
+        transaction.on_commit(lambda: bump_version("mealplanweek"))
+    return len(week_ids)
+
+
+def unarchive_weeks(week_ids):
+    """
+    Mark weeks active again and restore their meals from cold storage.
+    Meals whose recipe has since been deleted are dropped, as they would
+    have been by the cascade had the week stayed live. Returns the number
+    of weeks unarchived.
+    """
+    with transaction.atomic():
+        stored = list(ArchivedWeek.objects.filter(week_id__in=week_ids))
+        unpacked = {archived.week_id: unpack_meals(archived.data) for archived in stored}
+
+        recipe_ids = {meal["recipe_id"] for meals in unpacked.values() for meal in meals}
+        existing = set(Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True))
+
+        PlannedMeal.objects.bulk_create(
+            PlannedMeal(
+                week_id=week_id,
+                slot_name=meal["slot_name"],
+                recipe_id=meal["recipe_id"],
+                skipped=meal["skipped"],
+            )
+            for week_id, meals in unpacked.items()
+            for meal in meals
+            if meal["recipe_id"] in existing
+        )
+        ArchivedWeek.objects.filter(week_id__in=unpacked).delete()
+        updated = MealPlanWeek.objects.filter(pk__in=week_ids).update(archived=False)
+
+        # bulk_create() and update() send no signals.
+        transaction.on_commit(lambda: bump_version("plannedmeal"))
+        transaction.on_commit(lambda: bump_version("mealplanweek"))
+    return updated
@@ -0,0 +1,266 @@
+"""
+Weekly plan generator used by the "Auto-build this week" button.
+
+A build runs in one transaction, so a week is never left half rebuilt.
+Recipes are reserved by bumping `last_used` with a conditional UPDATE;
+if another worker got there first the UPDATE matches nothing and the next
+candidate is tried. Lock contention (e.g. "database is locked" on SQLite)
+is retried with exponential backoff; other database errors are raised
+straight away.
+
+Every build records a BuildReport: the time and queries of each step and,
+per slot, the size of the candidate pools and whether the fallback fired.
+Real builds log it to "planner.autobuild"; explain_week() runs the same
+picks without writing anything and returns the report.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, Q
+
+from .caching import bump_version
+from .models import MealPlanWeek, PlannedMeal, Recipe
+
+logger = logging.getLogger(__name__)
+
+# The slots we want: (slot name, meal type, course count)
+AUTOBUILD_SLOTS = [
+    ("Lunch", "lunch", 8),
+    ("Vegetarian Dinner", "vegetarian", 4),
+    ("Protein Dinner", "protein", 4),
+    ("Seafood Dinner", "seafood", 2),
+]
+
+# Recipes used within this many days of the week are avoided if possible.
+RECENT_DAYS = 30
+
+AUTOBUILD_ATTEMPTS = 5
+AUTOBUILD_BACKOFF = 0.05  # seconds, doubled on every retry
+
+# PostgreSQL SQLSTATEs worth retrying: serialization failure, deadlock.
+RETRY_SQLSTATES = {"40001", "40P01"}
+
+
+class QueryCounter:
+    """
+    Connection execute wrapper that counts the queries it sees.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class BuildReport:
+    """
+    Timings and query counts of one build, step by step. Slot steps also
+    carry the pool sizes, filters and outcome of the pick.
+    """
+
+    def __init__(self, week_pk, dry_run=False):
+        self.week_pk = week_pk
+        self.dry_run = dry_run
+        self.steps = []
+        self.meals = []
+        self.queries = QueryCounter()
+
+    @contextmanager
+    def step(self, name):
+        entry = {"step": name}
+        started, queries = time.perf_counter(), self.queries.count
+        yield entry
+        entry["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        entry["queries"] = self.queries.count - queries
+        self.steps.append(entry)
+
+    @property
+    def slots(self):
+        return [entry for entry in self.steps if "slot" in entry]
+
+    @property
+    def total_ms(self):
+        return round(sum(entry["ms"] for entry in self.steps), 2)
+
+    @property
+    def total_queries(self):
+        return sum(entry["queries"] for entry in self.steps)
+
+    def as_dict(self):
+        return {
+            "week": self.week_pk,
+            "dry_run": self.dry_run,
+            "meals": len(self.meals),
+            "ms": self.total_ms,
+            "queries": self.total_queries,
+            "steps": self.steps,
+        }
+
+    def log(self):
+        for slot in self.slots:
+            logger.log(
+                logging.WARNING if slot["recipe"] is None else logging.INFO,
+                "autobuild slot week=%s slot=%r pool=%d fresh=%d fallback=%s recipe=%s ms=%.1f queries=%d",
+                self.week_pk, slot["slot"], slot["pool"], slot["fresh"], slot["fallback"],
+                slot["recipe_id"], slot["ms"], slot["queries"],
+                extra={"autobuild": dict(slot, week=self.week_pk)},
+            )
+        logger.info(
+            "autobuild week=%s meals=%d ms=%.1f queries=%d",
+            self.week_pk, len(self.meals), self.total_ms, self.total_queries,
+            extra={"autobuild": self.as_dict()},
+        )
+
+
+def is_lock_error(exc):
+    """
+    True if an OperationalError is lock contention rather than, say, a
+    missing table: "database is locked" or busy on SQLite, a deadlock or
+    serialization failure on PostgreSQL.
+    """
+    cause = exc.__cause__
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    if sqlstate:
+        return sqlstate in RETRY_SQLSTATES
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def autobuild_week(week_pk):
+    """
+    Rebuild the planned meals of a week, retrying on lock contention.
+    Returns the created PlannedMeal objects.
+    """
+    for attempt in range(AUTOBUILD_ATTEMPTS):
+        try:
+            report = build_week(week_pk)
+        except OperationalError as exc:
+            if attempt == AUTOBUILD_ATTEMPTS - 1 or not is_lock_error(exc):
+                raise
+            logger.info("autobuild retry week=%s attempt=%d error=%r", week_pk, attempt + 1, str(exc))
+            delay = AUTOBUILD_BACKOFF * 2 ** attempt
+            time.sleep(delay + random.uniform(0, delay))
+        else:
+            report.log()
+            return report.meals
+
+
+def explain_week(week_pk):
+    """
+    Pick recipes for a week the way autobuild would, without writing
+    anything. Returns the BuildReport.
+    """
+    return build_week(week_pk, dry_run=True)
+
+
+def build_week(week_pk, dry_run=False):
+    """
+    Rebuild a week and return its BuildReport. With `dry_run`, nothing is
+    locked, deleted, reserved or created, and no transaction is opened
+    (on SQLite every transaction takes the write lock).
+    """
+    report = BuildReport(week_pk, dry_run)
+    atomic = nullcontext() if dry_run else transaction.atomic()
+    with connection.execute_wrapper(report.queries), atomic:
+        with report.step("load week"):
+            weeks = MealPlanWeek.objects.all() if dry_run else MealPlanWeek.objects.select_for_update()
+            week = weeks.get(pk=week_pk)
+
+        if not dry_run:
+            # Clear any existing planned meals for a clean rebuild.
+            with report.step("clear meals"):
+                week.meals.all().delete()
+
+        # Determine the reference date for "last used"
+        reference_date = week.start_date or date.today()
+        cutoff = reference_date - timedelta(days=RECENT_DAYS)
+
+        chosen_ids = set()
+        for slot_name, meal_type, course_count in AUTOBUILD_SLOTS:
+            with report.step(f"pick {slot_name}") as entry:
+                recipe, details = pick_recipe(
+                    meal_type, course_count, cutoff, reference_date, chosen_ids, dry_run
+                )
+                entry.update(details, slot=slot_name)
+            if recipe is not None:
+                report.meals.append(PlannedMeal(week=week, slot_name=slot_name, recipe=recipe))
+
+        if not dry_run:
+            with report.step("save meals"):
+                PlannedMeal.objects.bulk_create(report.meals)
+
+            # bulk_create() and update() send no signals.
+            transaction.on_commit(lambda: bump_version("plannedmeal"))
+            transaction.on_commit(lambda: bump_version("recipe"))
+    return report
+
+
+def pick_recipe(meal_type, course_count, cutoff, reference_date, chosen_ids, dry_run=False):
+    """
+    Reserve the least recently used matching recipe, falling back to
+    ignoring `last_used` if every match was used recently.
+
+    Returns the recipe (or None) and a dict describing the pick: the
+    number of matching recipes (`pool`), how many of them were not used
+    recently or already chosen (`fresh`), the filters applied, whether
+    the fallback fired and how many reservations were lost to other builds.
+    """
+    candidates = Recipe.objects.filter(
+        meal_type=meal_type,
+        course_count=course_count,
+    )
+    fresh = ~Q(last_used__gte=cutoff) & ~Q(id__in=chosen_ids)
+    details = candidates.aggregate(pool=Count("id"), fresh=Count("id", filter=fresh))
+    details.update(
+        filters=[
+            f"meal_type = {meal_type}",
+            f"course_count = {course_count}",
+            f"last_used before {cutoff} or never",
+            f"not already chosen ({len(chosen_ids)})",
+        ],
+        fallback=False,
+        lost=0,
+        recipe=None,
+        recipe_id=None,
+    )
+
+    pools = [
+        candidates.exclude(last_used__gte=cutoff).order_by("last_used", "name"),
+        # Fallback: ignore last_used / duplicates if needed
+        candidates.order_by("name"),
+    ]
+
+    for fallback, pool in enumerate(pools):
+        details["fallback"] = bool(fallback)
+        lost = set()
+        while True:
+            recipe = pool.exclude(id__in=chosen_ids | lost).first()
+            if recipe is None:
+                break
+            if dry_run or reserve_recipe(recipe, reference_date):
+                chosen_ids.add(recipe.id)
+                details.update(recipe=recipe.name, recipe_id=recipe.id)
+                return recipe, details
+            # Someone else reserved it since we read it.
+            lost.add(recipe.id)
+            details["lost"] += 1
+    return None, details
+
+
+def reserve_recipe(recipe, reference_date):
+    """
+    Set `last_used` only if it still holds the value we read.
+    """
+    updated = Recipe.objects.filter(
+        pk=recipe.pk,
+        last_used=recipe.last_used,
+    ).update(last_used=reference_date)
+    if updated:
+        recipe.last_used = reference_date
+    return bool(updated)
@@ -0,0 +1,192 @@
+"""
+Version-keyed caching for planner pages.
+
+Every planner model has a version counter in the cache. Saving or deleting
+a row bumps its model's counter (see planner/signals.py), and cache keys
+include the counters of the models a page reads, so stale entries are
+simply never looked up again and expire on their own.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+VERSION_KEY = "planner:version:{}"
+STATS_KEY = "planner:stats:{}:{}"
+STATS_INDEX_KEY = "planner:stats:names"
+
+
+def cache_timeout():
+    return getattr(settings, "MEALPREP_CACHE_TIMEOUT", 600)
+
+
+def new_version():
+    # Start from the clock rather than 1, so a counter evicted from the
+    # cache can never come back at a number that was already used.
+    return time.time_ns() // 1000
+
+
+def get_versions(model_names):
+    """
+    Current versions of `model_names` as one string, e.g.
+    "recipe.17:ingredient.42".
+    """
+    keys = [VERSION_KEY.format(name) for name in model_names]
+    found = cache.get_many(keys)
+    versions = []
+    for name, key in zip(model_names, keys):
+        version = found.get(key)
+        if version is None:
+            cache.add(key, new_version(), None)
+            version = cache.get(key)
+        versions.append(f"{name}.{version}")
+    return ":".join(versions)
+
+
+def bump_version(model_name):
+    key = VERSION_KEY.format(model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+class PendingBumps:
+    """
+    on_commit callback that bumps each model name once, however many rows
+    of it the transaction saved or deleted.
+    """
+
+    def __init__(self):
+        self.model_names = set()
+        # Test helpers can run on_commit callbacks without removing them.
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for model_name in self.model_names:
+            bump_version(model_name)
+
+
+def bump_version_on_commit(model_name):
+    """
+    Bump a model's version once the current transaction commits (at once
+    outside a transaction). Bumping earlier would let another worker cache
+    the old rows under the new version.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_version(model_name)
+        return
+    for _, callback, _ in connection.run_on_commit:
+        if isinstance(callback, PendingBumps) and not callback.done:
+            break
+    else:
+        callback = PendingBumps()
+        transaction.on_commit(callback)
+    callback.model_names.add(model_name)
+
+
+def make_key(prefix, *parts):
+    digest = hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f"planner:{prefix}:{digest}"
+
+
+# ---------- Hit/miss counters ----------
+
+def record(name, hit):
+    key = STATS_KEY.format(name, "hits" if hit else "misses")
+    if cache.add(key, 1, None):
+        names = cache.get(STATS_INDEX_KEY, set())
+        if name not in names:
+            cache.set(STATS_INDEX_KEY, names | {name}, None)
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def cache_stats():
+    """
+    name -> {"hits": n, "misses": n} for every cached view and fragment.
+    """
+    stats = {}
+    for name in sorted(cache.get(STATS_INDEX_KEY, set())):
+        stats[name] = {
+            "hits": cache.get(STATS_KEY.format(name, "hits"), 0),
+            "misses": cache.get(STATS_KEY.format(name, "misses"), 0),
+        }
+    return stats
+
+
+def reset_stats():
+    names = cache.get(STATS_INDEX_KEY, set())
+    cache.delete_many(
+        [STATS_KEY.format(name, kind) for name in names for kind in ("hits", "misses")]
+        + [STATS_INDEX_KEY]
+    )
+
+
+# ---------- Fragments and responses ----------
+
+def cached_fragment(name, model_names, vary_on, render):
+    """
+    Return the cached output of `render()` for this fragment, rendering
+    and storing it on a miss.
+    """
+    key = make_key("fragment", name, get_versions(model_names), *vary_on)
+    content = cache.get(key)
+    if content is not None:
+        record(f"fragment:{name}", True)
+        return content
+
+    record(f"fragment:{name}", False)
+    content = render()
+    cache.set(key, content, cache_timeout())
+    return content
+
+
+def cache_response(*model_names):
+    """
+    Cache the full response of a view for anonymous GETs with no pending
+    messages, keyed by the URL and the versions of `model_names`.
+
+    Pages with forms embed a CSRF token, so the key also includes the
+    visitor's CSRF cookie, and a page that had to mint a new cookie is
+    never stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method != "GET"
+                or request.user.is_authenticated
+                or get_messages(request)
+            ):
+                return view(request, *args, **kwargs)
+
+            csrf_secret = request.META.get("CSRF_COOKIE", "")
+            key = make_key(
+                "response", request.get_full_path(), get_versions(model_names), csrf_secret
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                record(f"view:{view.__name__}", True)
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            record(f"view:{view.__name__}", False)
+            response = view(request, *args, **kwargs)
+
+            minted_cookie = not csrf_secret and "CSRF_COOKIE" in request.META
+            if response.status_code == 200 and not response.streaming and not minted_cookie:
+                cache.set(key, (response.content, response["Content-Type"]), cache_timeout())
+            return response
+        return wrapper
+    return decorator
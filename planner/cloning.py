@@ -0,0 +1,106 @@
+"""
+Cloning weeks and applying plan templates.
+
+Both come down to a list of slots (slot name, recipe id, skipped) stamped
+onto one or more target weeks with a single bulk_create, inside one
+transaction, optionally followed by one bulk_update of `last_used`.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from .archive import unpack_meals
+from .caching import bump_version
+from .models import ArchivedWeek, MealPlanWeek, PlanTemplate, PlanTemplateSlot, PlannedMeal, Recipe
+
+
+def week_slots(week):
+    """
+    (slot_name, recipe_id, skipped) for every meal of a week, including
+    weeks whose meals are in cold storage. Stored meals whose recipe has
+    since been deleted are dropped, as unarchive_weeks() drops them.
+    """
+    if week.archived:
+        stored = ArchivedWeek.objects.filter(week=week).first()
+        if stored is not None:
+            meals = unpack_meals(stored.data)
+            existing = set(
+                Recipe.objects.filter(pk__in={meal["recipe_id"] for meal in meals})
+                .values_list("pk", flat=True)
+            )
+            return [
+                (meal["slot_name"], meal["recipe_id"], meal["skipped"])
+                for meal in meals
+                if meal["recipe_id"] in existing
+            ]
+    return list(week.meals.order_by("slot_name", "id").values_list("slot_name", "recipe_id", "skipped"))
+
+
+def template_slots(template):
+    return list(template.slots.values_list("slot_name", "recipe_id", "skipped"))
+
+
+def save_as_template(week, name):
+    with transaction.atomic():
+        template = PlanTemplate.objects.create(name=name)
+        PlanTemplateSlot.objects.bulk_create(
+            PlanTemplateSlot(
+                template=template,
+                slot_name=slot_name,
+                recipe_id=recipe_id,
+                skipped=skipped,
+                position=i,
+            )
+            for i, (slot_name, recipe_id, skipped) in enumerate(week_slots(week))
+        )
+    return template
+
+
+def new_weeks(count, first_start_date, label_prefix="Week of"):
+    """
+    Unsaved weeks starting `first_start_date` and every 7 days after.
+    """
+    return [
+        MealPlanWeek(
+            label=f"{label_prefix} {start:%b %d}".strip(),
+            start_date=start,
+        )
+        for start in (first_start_date + timedelta(weeks=i) for i in range(count))
+    ]
+
+
+def apply_slots(slots, weeks, create=(), replace=False, update_last_used=False):
+    """
+    Add `slots` to every week in `weeks`, plus the unsaved weeks in
+    `create`, which are inserted first. With `replace`, the targets'
+    existing meals are removed. With `update_last_used`, each recipe's
+    `last_used` is moved forward to the latest target start date.
+    Returns the list of target weeks.
+    """
+    with transaction.atomic():
+        created = MealPlanWeek.objects.bulk_create(list(create))
+        targets = list(weeks) + created
+        target_ids = [week.pk for week in targets]
+
+        if replace:
+            PlannedMeal.objects.filter(week_id__in=target_ids).delete()
+
+        PlannedMeal.objects.bulk_create(
+            PlannedMeal(week_id=week_id, slot_name=slot_name, recipe_id=recipe_id, skipped=skipped)
+            for week_id in target_ids
+            for slot_name, recipe_id, skipped in slots
+        )
+
+        if update_last_used:
+            used_on = max((week.start_date or date.today() for week in targets), default=None)
+            recipes = list(Recipe.objects.filter(pk__in={recipe_id for _, recipe_id, _ in slots}))
+            changed = [r for r in recipes if used_on and (r.last_used is None or r.last_used < used_on)]
+            for recipe in changed:
+                recipe.last_used = used_on
+            Recipe.objects.bulk_update(changed, ["last_used"])
+            transaction.on_commit(lambda: bump_version("recipe"))
+
+        # bulk_create() and bulk_update() send no signals.
+        transaction.on_commit(lambda: bump_version("mealplanweek"))
+        transaction.on_commit(lambda: bump_version("plannedmeal"))
+    return targets
@@ -0,0 +1,191 @@
+"""
+Near-duplicate recipe detection.
+
+Each recipe's normalized ingredient names are reduced to a MinHash
+signature; the fraction of positions two signatures agree on estimates the
+Jaccard similarity of their ingredient sets. Signatures are split into
+bands and each band is hashed into an indexed RecipeBand row, so recipes
+sharing any band bucket are candidates (locality-sensitive hashing) and
+only those pairs are compared.
+"""
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import RecipeBand, RecipeSignature
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # candidates from about 0.5 similarity up
+
+# Estimated ingredient overlap at which two recipes are reported.
+DUPLICATE_THRESHOLD = 0.6
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed: signatures are stored, so the hash family must never change.
+_rng = random.Random(20251207)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalize_ingredient(name):
+    """
+    "Black Beans, rinsed" -> "black beans rinsed"
+    """
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def ingredient_set(names):
+    return {n for n in (normalize_ingredient(name) for name in names) if n}
+
+
+def minhash(tokens):
+    """
+    MinHash signature of a set of strings, or None for an empty set.
+    """
+    if not tokens:
+        return None
+    hashed = [
+        int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+        for token in tokens
+    ]
+    return [
+        min((a * h + b) % MERSENNE_PRIME for h in hashed)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def band_buckets(signature):
+    """
+    One signed 64-bit bucket per band, to store in RecipeBand.bucket.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS}Q", *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def pack_signature(signature):
+    return struct.pack(f"<{NUM_PERM}Q", *signature)
+
+
+def unpack_signature(data):
+    return list(struct.unpack(f"<{NUM_PERM}Q", bytes(data)))
+
+
+def similarity(sig_a, sig_b):
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+
+# ---------- Storage ----------
+
+def update_signatures(recipes):
+    """
+    Recompute and store the signatures of `recipes`; their ingredients
+    should be prefetched.
+    """
+    save_signatures({
+        recipe: [ing.name for ing in recipe.ingredients.all()] for recipe in recipes
+    })
+
+
+def save_signatures(names_by_recipe):
+    """
+    Store signatures for a {recipe: [ingredient name, ...]} mapping,
+    replacing any previous ones.
+    """
+    signatures = []
+    bands = []
+    for recipe, names in names_by_recipe.items():
+        signature = minhash(ingredient_set(names))
+        if signature is None:
+            continue
+        signatures.append(RecipeSignature(recipe=recipe, minhash=pack_signature(signature)))
+        bands.extend(
+            RecipeBand(recipe=recipe, band=band, bucket=bucket)
+            for band, bucket in enumerate(band_buckets(signature))
+        )
+
+    ids = [recipe.pk for recipe in names_by_recipe]
+    with transaction.atomic():
+        RecipeSignature.objects.filter(recipe_id__in=ids).delete()
+        RecipeBand.objects.filter(recipe_id__in=ids).delete()
+        RecipeSignature.objects.bulk_create(signatures)
+        RecipeBand.objects.bulk_create(bands)
+
+
+# ---------- Lookups ----------
+
+def find_similar(ingredient_names, exclude_pk=None, threshold=DUPLICATE_THRESHOLD):
+    """
+    Stored recipes whose ingredients look like `ingredient_names`, as
+    (recipe, similarity) pairs, most similar first.
+    """
+    signature = minhash(ingredient_set(ingredient_names))
+    if signature is None:
+        return []
+
+    in_same_bucket = Q()
+    for band, bucket in enumerate(band_buckets(signature)):
+        in_same_bucket |= Q(band=band, bucket=bucket)
+    candidate_ids = RecipeBand.objects.filter(in_same_bucket).values("recipe_id")
+    if exclude_pk is not None:
+        candidate_ids = candidate_ids.exclude(recipe_id=exclude_pk)
+
+    matches = []
+    for stored in RecipeSignature.objects.filter(recipe_id__in=candidate_ids).select_related("recipe"):
+        score = similarity(signature, unpack_signature(stored.minhash))
+        if score >= threshold:
+            matches.append((stored.recipe, score))
+    return sorted(matches, key=lambda match: -match[1])
+
+
+def find_duplicate_pairs(threshold=DUPLICATE_THRESHOLD):
+    """
+    Every stored (recipe, recipe, similarity) pair at or above `threshold`,
+    most similar first. Only recipes sharing a band bucket are compared.
+    """
+    shared = (
+        RecipeBand.objects.values("band", "bucket")
+        .annotate(size=Count("id"))
+        .filter(size__gt=1)
+    )
+    buckets = defaultdict(list)
+    rows = RecipeBand.objects.filter(
+        bucket__in=shared.values("bucket")
+    ).values_list("band", "bucket", "recipe_id")
+    for band, bucket, recipe_id in rows:
+        buckets[(band, bucket)].append(recipe_id)
+
+    candidates = set()
+    for recipe_ids in buckets.values():
+        recipe_ids.sort()
+        for i, a in enumerate(recipe_ids):
+            for b in recipe_ids[i + 1:]:
+                candidates.add((a, b))
+    if not candidates:
+        return []
+
+    ids = {pk for pair in candidates for pk in pair}
+    signatures = {
+        stored.recipe_id: (stored.recipe, unpack_signature(stored.minhash))
+        for stored in RecipeSignature.objects.filter(recipe_id__in=ids).select_related("recipe")
+    }
+
+    pairs = []
+    for a, b in candidates:
+        (recipe_a, sig_a), (recipe_b, sig_b) = signatures[a], signatures[b]
+        score = similarity(sig_a, sig_b)
+        if score >= threshold:
+            pairs.append((recipe_a, recipe_b, score))
+    return sorted(pairs, key=lambda pair: (-pair[2], pair[0].name, pair[1].name))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from planner.caching import cache_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters for cached planner pages and fragments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters afterwards.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        if not stats:
+            self.stdout.write("No cache activity recorded.")
+
+        for name, counts in stats.items():
+            total = counts["hits"] + counts["misses"]
+            ratio = counts["hits"] / total if total else 0
+            self.stdout.write(
+                f"{name:<40} {counts['hits']:>8} hits {counts['misses']:>8} misses {ratio:>6.1%}"
+            )
+
+        if options["reset"]:
+            reset_stats()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from planner.archive import archive_weeks
+from planner.models import MealPlanWeek
+
+
+class Command(BaseCommand):
+    help = "Move the meals of archived weeks that are still in the live tables to cold storage."
+
+    def handle(self, *args, **options):
+        week_ids = MealPlanWeek.objects.filter(archived=True, cold_storage__isnull=True)
+        compacted = archive_weeks(list(week_ids.values_list("pk", flat=True)))
+        self.stdout.write(f"Compacted {compacted} archived week(s).")
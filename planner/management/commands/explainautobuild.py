@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.autobuild import explain_week
+from planner.models import MealPlanWeek
+
+
+class Command(BaseCommand):
+    help = "Show what auto-build would pick for a week, and why, without changing anything."
+
+    def add_arguments(self, parser):
+        parser.add_argument("week", type=int, help="Primary key of the week.")
+        parser.add_argument(
+            "--json", action="store_true",
+            help="Print the report as JSON, in the same shape as the autobuild logs.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = explain_week(options["week"])
+        except MealPlanWeek.DoesNotExist:
+            raise CommandError(f"No week with pk {options['week']}.")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict(), indent=2))
+            return
+
+        for slot in report.slots:
+            picked = f"{slot['recipe']} (#{slot['recipe_id']})" if slot["recipe_id"] else "nothing"
+            fallback = ", fallback" if slot["fallback"] else ""
+            self.stdout.write(
+                f"{slot['slot']}: {picked} — {slot['fresh']} fresh of {slot['pool']} matching{fallback}"
+            )
+            self.stdout.write(f"    filters: {'; '.join(slot['filters'])}")
+        for step in report.steps:
+            self.stdout.write(f"{step['step']:<28} {step['ms']:>8.2f} ms {step['queries']:>3} queries")
+        self.stdout.write(f"{'total':<28} {report.total_ms:>8.2f} ms {report.total_queries:>3} queries")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from planner.dedupe import DUPLICATE_THRESHOLD, find_duplicate_pairs, update_signatures
+from planner.models import Recipe
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "List recipes that look like the same dish entered twice, by ingredient overlap."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold", type=float, default=DUPLICATE_THRESHOLD,
+            help=f"Minimum estimated ingredient overlap (default {DUPLICATE_THRESHOLD}).",
+        )
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Recompute every signature, not just the missing ones.",
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.order_by("pk").prefetch_related("ingredients")
+        if not options["rebuild"]:
+            recipes = recipes.filter(signature__isnull=True)
+
+        ids = list(recipes.values_list("pk", flat=True))
+        for start in range(0, len(ids), BATCH_SIZE):
+            update_signatures(recipes.filter(pk__in=ids[start:start + BATCH_SIZE]))
+        if ids:
+            self.stdout.write(f"Updated {len(ids)} signature(s).")
+
+        pairs = find_duplicate_pairs(options["threshold"])
+        for recipe_a, recipe_b, score in pairs:
+            self.stdout.write(f"{score:>5.0%}  {recipe_a.name} (#{recipe_a.pk})  ~  {recipe_b.name} (#{recipe_b.pk})")
+        self.stdout.write(f"{len(pairs)} likely duplicate pair(s).")
@@ -0,0 +1,83 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+
+from planner.models import INGREDIENT_CATEGORIES, MealPlanWeek, Recipe
+from planner.pantry import shopping_items
+from planner.pdfstore import prerender, prune_store
+from planner.views import shopping_list_pdf_context
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the PDFs of every recipe planned in upcoming weeks, and the "
+        "shopping list for those weeks, into the PDF store. Meant for cron, "
+        "ahead of busy times."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=7,
+            help="Include weeks starting up to this many days ahead, plus the current week (default 7).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Rendering processes (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--keep-days", type=int, default=14,
+            help="Delete stored PDFs not written or pre-rendered for this many days (default 14).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        today = date.today()
+        weeks = MealPlanWeek.objects.filter(
+            skipped=False,
+            archived=False,
+            start_date__gt=today - timedelta(days=7),
+            start_date__lte=today + timedelta(days=options["days"]),
+        ).order_by("start_date", "id")
+        week_ids = list(weeks.values_list("pk", flat=True))
+
+        recipes = (
+            Recipe.objects.filter(plannedmeal__week_id__in=week_ids, plannedmeal__skipped=False)
+            .distinct()
+            .order_by("pk")
+            .prefetch_related("ingredients")
+        )
+        recipe_template = get_template("planner/recipe_pdf.html")
+        documents = [recipe_template.render({"recipe": recipe}) for recipe in recipes]
+
+        # The list the shopping page builds when exactly these weeks are selected.
+        if week_ids:
+            grouped = {key: [] for key, _ in INGREDIENT_CATEGORIES}
+            for item in shopping_items(week_ids):
+                grouped.setdefault(item["category"], []).append(item["label"])
+            documents.append(
+                get_template("planner/shopping_list_pdf.html").render(
+                    shopping_list_pdf_context(weeks, grouped)
+                )
+            )
+        prepared = time.perf_counter() - started
+
+        pruned = prune_store(options["keep_days"])
+        stats = prerender(documents, workers=options["workers"])
+
+        self.stdout.write(
+            f"{len(week_ids)} upcoming week(s): {len(documents)} PDF(s), "
+            f"HTML prepared in {prepared:.2f}s."
+        )
+        if stats["rendered"]:
+            seconds = stats["seconds"]
+            self.stdout.write(
+                f"Rendered {stats['rendered']} PDF(s) in {seconds:.2f}s "
+                f"({stats['rendered'] / seconds:.1f} PDFs/s, "
+                f"{stats['bytes'] / seconds / 1024 / 1024:.2f} MB/s)."
+            )
+        self.stdout.write(
+            f"{stats['stored']} already stored, {stats['failed']} failed, "
+            f"{pruned} stale file(s) pruned."
+        )
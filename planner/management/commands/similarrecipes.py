@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from planner.similar import refresh_neighbors
+
+
+class Command(BaseCommand):
+    help = "Refresh the precomputed 'similar recipes' suggestions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Recompute every recipe, e.g. nightly, so ingredient weights stay current.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        refreshed = refresh_neighbors(rebuild=options["rebuild"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Refreshed suggestions for {refreshed} recipe(s) in {elapsed:.2f}s.")
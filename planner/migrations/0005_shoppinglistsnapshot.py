@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0004_recipe_source_note'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('weeks', models.ManyToManyField(blank=True, related_name='shopping_lists', to='planner.mealplanweek')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('pantry', 'Pantry'), ('produce', 'Produce'), ('protein', 'Protein'), ('frozen', 'Frozen'), ('dairy', 'Dairy')], max_length=20)),
+                ('label', models.CharField(max_length=320)),
+                ('checked', models.BooleanField(default=True)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='planner.shoppinglistsnapshot')),
+            ],
+            options={
+                'ordering': ['position', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0006_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedWeek',
+            fields=[
+                ('week', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cold_storage', serialize=False, to='planner.mealplanweek')),
+                ('meal_count', models.PositiveIntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0008_recipe_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeTermDigest',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='term_digest', serialize=False, to='planner.recipe')),
+                ('digest', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='planner.recipe')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='planner.recipe')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['recipe', 'rank'], name='planner_rec_recipe__c1d90e_idx')],
+            },
+        ),
+    ]
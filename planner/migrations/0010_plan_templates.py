@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0009_recipe_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlanTemplateSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_name', models.CharField(max_length=100)),
+                ('skipped', models.BooleanField(default=False)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='planner.recipe')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='planner.plantemplate')),
+            ],
+            options={
+                'ordering': ['position', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0010_plan_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppinglistitem',
+            name='name',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='shoppinglistitem',
+            name='quantity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='shoppinglistsnapshot',
+            name='purchased_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='PantryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('category', models.CharField(blank=True, choices=[('pantry', 'Pantry'), ('produce', 'Produce'), ('protein', 'Protein'), ('frozen', 'Frozen'), ('dairy', 'Dairy')], max_length=20)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['category', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'category'), name='unique_pantry_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:16
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0011_pantry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='planner_ingredient_name_nocase'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplanweek',
+            index=models.Index(django.db.models.functions.comparison.Collate('label', 'NOCASE'), name='planner_week_label_nocase'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='planner_recipe_name_nocase'),
+        ),
+    ]
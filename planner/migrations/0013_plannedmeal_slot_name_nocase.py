@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:39
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0012_nocase_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plannedmeal',
+            index=models.Index(django.db.models.functions.comparison.Collate('slot_name', 'NOCASE'), name='planner_meal_slot_nocase'),
+        ),
+    ]
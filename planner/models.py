@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Collate
 from django.utils import timezone
  
 # Create your models here.
@@ -22,7 +24,7 @@ MEAL_TYPES = [
 ]
 
 class Recipe(models.Model):
-	name = models.CharField(max_length=200)
+	name = models.CharField(max_length=200, db_index=True)
 	course_count = models.PositiveIntegerField()
 	meal_type = models.CharField(max_length=20, choices=MEAL_TYPES, default="other")
 	source_note = models.CharField(
@@ -32,24 +34,89 @@ class Recipe(models.Model):
     )
 	last_used = models.DateField(null=True, blank=True)
 
+	class Meta:
+		# Admin search is a case-insensitive LIKE 'prefix%', which SQLite can
+		# only answer from a NOCASE index.
+		indexes = [models.Index(Collate("name", "NOCASE"), name="planner_recipe_name_nocase")]
+
 	def __str__(self):
 		return self.name
 
 class Ingredient(models.Model):
 	recipe = models.ForeignKey(Recipe, related_name="ingredients", on_delete=models.CASCADE)
-	name = models.CharField(max_length=200)
+	name = models.CharField(max_length=200, db_index=True)
 	amount = models.CharField(max_length=100, blank=True) #"1 can", "15.5oz", etc. 
 	category = models.CharField(max_length=20, choices=INGREDIENT_CATEGORIES)
 
+	class Meta:
+		indexes = [models.Index(Collate("name", "NOCASE"), name="planner_ingredient_name_nocase")]
+
 	def __str__(self):
 		return f"{self.name} ({self.recipe.name})"
 
+class RecipeSignature(models.Model):
+	"""
+	MinHash signature of a recipe's normalized ingredient names, used to
+	spot the same dish entered twice. See planner/dedupe.py.
+	"""
+	recipe = models.OneToOneField(Recipe, related_name="signature", on_delete=models.CASCADE, primary_key=True)
+	minhash = models.BinaryField() #packed unsigned 64-bit ints
+
+	def __str__(self):
+		return f"Signature of {self.recipe_id}"
+
+class RecipeBand(models.Model):
+	"""
+	One LSH band bucket of a RecipeSignature. Recipes sharing a
+	(band, bucket) pair are duplicate candidates.
+	"""
+	recipe = models.ForeignKey(Recipe, related_name="bands", on_delete=models.CASCADE)
+	band = models.PositiveSmallIntegerField()
+	bucket = models.BigIntegerField()
+
+	class Meta:
+		indexes = [models.Index(fields=["band", "bucket"])]
+
+	def __str__(self):
+		return f"{self.recipe_id}: band {self.band}"
+
+class RecipeNeighbor(models.Model):
+	"""
+	Precomputed "recipes like this one", refreshed offline by
+	`manage.py similarrecipes`. See planner/similar.py.
+	"""
+	recipe = models.ForeignKey(Recipe, related_name="neighbors", on_delete=models.CASCADE)
+	neighbor = models.ForeignKey(Recipe, related_name="+", on_delete=models.CASCADE)
+	score = models.FloatField()
+	rank = models.PositiveSmallIntegerField()
+
+	class Meta:
+		ordering = ["rank"]
+		indexes = [models.Index(fields=["recipe", "rank"])]
+
+	def __str__(self):
+		return f"{self.recipe_id} ~ {self.neighbor_id} ({self.score:.2f})"
+
+class RecipeTermDigest(models.Model):
+	"""
+	Fingerprint of the terms a recipe's neighbours were computed from, so
+	the refresh only redoes recipes whose ingredients changed.
+	"""
+	recipe = models.OneToOneField(Recipe, related_name="term_digest", on_delete=models.CASCADE, primary_key=True)
+	digest = models.CharField(max_length=32)
+
+	def __str__(self):
+		return self.digest
+
 class MealPlanWeek(models.Model):
-	label = models.CharField(max_length=50) #"Week 1" "Week 2", etc
+	label = models.CharField(max_length=50, db_index=True) #"Week 1" "Week 2", etc
 	start_date = models.DateField(null=True, blank=True)
 	skipped = models.BooleanField(default=False)
 	archived = models.BooleanField(default=False)
 
+	class Meta:
+		indexes = [models.Index(Collate("label", "NOCASE"), name="planner_week_label_nocase")]
+
 	def __str__(self):
 		return self.label
 
@@ -59,7 +126,130 @@ class PlannedMeal(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
     skipped = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(Collate("slot_name", "NOCASE"), name="planner_meal_slot_nocase")]
+
     def __str__(self):
         return f"{self.slot_name}: {self.recipe.name}"
 
 
+
+class PlanTemplate(models.Model):
+    """
+    A reusable week: named slot -> recipe mappings that can be stamped onto
+    any number of weeks at once. See planner/cloning.py.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+class PlanTemplateSlot(models.Model):
+    template = models.ForeignKey(PlanTemplate, related_name="slots", on_delete=models.CASCADE)
+    slot_name = models.CharField(max_length=100)
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    skipped = models.BooleanField(default=False)
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["position", "id"]
+
+    def __str__(self):
+        return f"{self.slot_name}: {self.recipe_id}"
+
+class ArchivedWeek(models.Model):
+    """
+    Cold storage for an archived week: its planned meals packed into one
+    compressed blob, so they no longer sit in the PlannedMeal table.
+    See planner/archive.py.
+    """
+    week = models.OneToOneField(
+        MealPlanWeek, related_name="cold_storage", on_delete=models.CASCADE, primary_key=True
+    )
+    meal_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()  # zlib-compressed JSON: [[slot_name, recipe_id, recipe_name, skipped], ...]
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.week} ({self.meal_count} meals)"
+
+class PantryItem(models.Model):
+    """
+    Stock on hand, subtracted from shopping lists. A row with a name
+    covers that ingredient (matched case-insensitively); a row with only a
+    category covers every ingredient in it, e.g. pantry staples.
+    `quantity` counts how many planned meals the stock covers.
+    """
+    name = models.CharField(max_length=200, blank=True)  # stored lowercased
+    category = models.CharField(max_length=20, choices=INGREDIENT_CATEGORIES, blank=True)
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["category", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["name", "category"], name="unique_pantry_item"),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.get_category_display()} ({self.quantity})"
+
+    def save(self, *args, **kwargs):
+        self.name = self.name.strip().lower()
+        super().save(*args, **kwargs)
+
+class ShoppingListSnapshot(models.Model):
+    """
+    A shopping list frozen at generation time, so the PDF, a reprint or the
+    phone view can refer to it by id instead of posting every item back.
+    `version` is bumped whenever the checked state changes.
+    """
+    created_at = models.DateTimeField(default=timezone.now)
+    weeks = models.ManyToManyField(MealPlanWeek, related_name="shopping_lists", blank=True)
+    version = models.PositiveIntegerField(default=1)
+    purchased_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Shopping list #{self.pk} ({self.created_at:%Y-%m-%d})"
+
+    def set_checked(self, item_ids):
+        """
+        Mark exactly `item_ids` as checked. Bumps `version` only if something
+        actually changed; returns True in that case.
+        """
+        item_ids = {int(i) for i in item_ids if str(i).isdigit()}
+        changed = (
+            self.items.filter(checked=True).exclude(pk__in=item_ids).update(checked=False)
+            + self.items.filter(checked=False, pk__in=item_ids).update(checked=True)
+        )
+        if changed:
+            ShoppingListSnapshot.objects.filter(pk=self.pk).update(version=F("version") + 1)
+            self.refresh_from_db(fields=["version"])
+        return bool(changed)
+
+    def items_by_category(self, checked_only=False):
+        """
+        category key -> list of ShoppingListItem, in INGREDIENT_CATEGORIES order.
+        """
+        grouped = {key: [] for key, _ in INGREDIENT_CATEGORIES}
+        items = self.items.all()
+        if checked_only:
+            items = items.filter(checked=True)
+        for item in items:
+            grouped.setdefault(item.category, []).append(item)
+        return grouped
+
+class ShoppingListItem(models.Model):
+    snapshot = models.ForeignKey(ShoppingListSnapshot, related_name="items", on_delete=models.CASCADE)
+    category = models.CharField(max_length=20, choices=INGREDIENT_CATEGORIES)
+    label = models.CharField(max_length=320)  # "1 can – black beans"
+    name = models.CharField(max_length=200, blank=True)  # "black beans", for restocking the pantry
+    quantity = models.PositiveIntegerField(default=1)  # meals still needing it after pantry stock
+    checked = models.BooleanField(default=True)
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["position", "id"]
+
+    def __str__(self):
+        return self.label
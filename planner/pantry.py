@@ -0,0 +1,157 @@
+"""
+Pantry stock and the shopping-list query that subtracts it.
+
+The shopping list is one grouped query over the ingredients of the
+selected weeks' meals: each distinct (category, name, amount) is counted
+once per planned meal and the matching pantry stock is looked up with
+correlated subqueries. The stock of a name is shared across its amount
+rows ("1 can" and "2 cans" of beans draw on the same beans) by a running
+total over each name, and rows the stock fully covers are filtered out
+in the database.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Func, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, Lower, Trim
+from django.utils import timezone
+
+from .models import Ingredient, PantryItem, ShoppingListSnapshot
+
+
+class RunningSum(Func):
+    """
+    SUM() for use in a Window over a grouped query. Sum() refuses an
+    aggregate argument, but SUM(COUNT(...)) OVER (...) is valid SQL.
+    """
+    function = "SUM"
+    window_compatible = True
+
+
+def shopping_items(week_ids):
+    """
+    Dicts of category, name, amount, label and quantity (meals still
+    needing the ingredient) for the non-skipped meals of the selected
+    non-skipped, non-archived weeks, ordered by category and name.
+
+    Stock kept under an ingredient's name covers that name in every
+    category; otherwise a category-wide row (no name) covers each name in
+    the category. Either way, one name's stock is used up once across all
+    of its amounts.
+    """
+    name_stock = (
+        PantryItem.objects.filter(name=Lower(OuterRef("key_name")))
+        .order_by()
+        .values("name")
+        .annotate(total=Sum("quantity"))
+        .values("total")[:1]
+    )
+    category_stock = (
+        PantryItem.objects.filter(name="", category=OuterRef("category"))
+        .values("quantity")[:1]
+    )
+
+    rows = (
+        Ingredient.objects.filter(
+            recipe__plannedmeal__week_id__in=week_ids,
+            recipe__plannedmeal__week__skipped=False,
+            recipe__plannedmeal__week__archived=False,
+            recipe__plannedmeal__skipped=False,
+        )
+        .annotate(key_name=Trim("name"), key_amount=Trim("amount"))
+        .values("category", "key_name", "key_amount")
+        .annotate(
+            needed=Count("recipe__plannedmeal"),
+            name_on_hand=Subquery(name_stock),
+            on_hand=Coalesce("name_on_hand", Subquery(category_stock), Value(0)),
+        )
+        # A separate annotate(), so the window stays out of the GROUP BY.
+        .annotate(
+            # Meals needing this name up to and including this amount.
+            running=Window(
+                RunningSum(Count("recipe__plannedmeal")),
+                partition_by=[
+                    Lower("key_name"),
+                    Case(When(name_on_hand__isnull=False, then=Value("")), default="category"),
+                ],
+                order_by=["category", "key_amount"],
+            ),
+        )
+        .filter(running__gt=F("on_hand"))
+        .order_by("category", "key_name", "key_amount")
+    )
+
+    items = []
+    for row in rows:
+        name, amount = row["key_name"], row["key_amount"]
+        items.append({
+            "category": row["category"],
+            "name": name,
+            "amount": amount,
+            "label": f"{amount} – {name}" if amount else name,
+            # Stock left after the earlier amounts covers part of this one.
+            "quantity": min(row["needed"], row["running"] - row["on_hand"]),
+        })
+    return items
+
+
+def restock(items):
+    """
+    Add purchased shopping-list items to the pantry: one UPDATE for the
+    names already stocked and one INSERT for the rest.
+
+    Stock of a name is summed across its rows, so each purchase goes to
+    one row only: the one in the item's category if there is one,
+    otherwise the oldest row with that name.
+    """
+    added = defaultdict(int)
+    categories = {}
+    for item in items:
+        name = item.name.strip().lower()
+        if name:
+            added[name] += item.quantity
+            categories.setdefault(name, item.category)
+    if not added:
+        return 0
+
+    with transaction.atomic():
+        stocked = list(
+            PantryItem.objects.filter(name__in=added)
+            .order_by("pk")
+            .values_list("pk", "name", "category")
+        )
+        targets = {}
+        for pk, name, category in stocked:
+            targets.setdefault(name, pk)
+        for pk, name, category in stocked:
+            if category == categories[name]:
+                targets[name] = pk
+        if targets:
+            PantryItem.objects.filter(pk__in=targets.values()).update(
+                quantity=F("quantity") + Case(
+                    *(When(pk=pk, then=Value(added[name])) for name, pk in targets.items()),
+                    default=Value(0),
+                )
+            )
+        PantryItem.objects.bulk_create(
+            PantryItem(name=name, category=categories[name], quantity=quantity)
+            for name, quantity in added.items()
+            if name not in targets
+        )
+    return len(added)
+
+
+def mark_purchased(snapshot):
+    """
+    Restock the pantry with a snapshot's checked items, once.
+    Returns False if the snapshot was already marked purchased.
+    """
+    with transaction.atomic():
+        claimed = ShoppingListSnapshot.objects.filter(
+            pk=snapshot.pk, purchased_at__isnull=True
+        ).update(purchased_at=timezone.now())
+        if not claimed:
+            return False
+        restock(snapshot.items.filter(checked=True))
+    snapshot.refresh_from_db(fields=["purchased_at"])
+    return True
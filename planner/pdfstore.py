@@ -0,0 +1,123 @@
+"""
+Persistent on-disk store of rendered PDFs.
+
+Files live under MEALPREP_PDF_DIR and are named by a digest of the HTML
+they were converted from. Rendering a template to HTML takes milliseconds;
+converting it with xhtml2pdf is what takes the time, and that happens once
+per distinct HTML. A stored file never needs invalidating: an edited recipe
+or a different shopping list renders different HTML and simply misses.
+
+`manage.py prerenderpdfs` fills the store ahead of busy times, converting
+in a process pool, and prunes files nobody has asked for in a while.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+def store_dir():
+    return Path(getattr(settings, "MEALPREP_PDF_DIR", settings.BASE_DIR / "pdfs"))
+
+
+def pdf_key(html):
+    return hashlib.sha256(html.encode()).hexdigest()
+
+
+def stored_path(key, directory=None):
+    return Path(directory or store_dir()) / key[:2] / f"{key}.pdf"
+
+
+def read_pdf(key):
+    try:
+        return stored_path(key).read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def write_pdf(key, pdf_bytes, directory=None):
+    """
+    Store a PDF by writing a temporary file and renaming it into place,
+    so concurrent readers never see a partial file.
+    """
+    path = stored_path(key, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(pdf_bytes)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    return path
+
+
+def convert_to_store(job):
+    """
+    Process pool worker: convert (key, html, directory) to PDF and store
+    it. Needs no database. Returns the PDF size, or None on error.
+    """
+    from .utils import html_to_pdf
+
+    key, html, directory = job
+    pdf_bytes = html_to_pdf(html)
+    if pdf_bytes is None:
+        return None
+    write_pdf(key, pdf_bytes, directory)
+    return len(pdf_bytes)
+
+
+def prerender(documents, workers=None):
+    """
+    Store the PDFs of `documents` (HTML strings) that are not stored yet,
+    converting in parallel. Files already stored are touched so pruning
+    keeps them.
+
+    Returns a dict of counts (rendered, stored, failed), the total bytes
+    rendered and the seconds spent converting.
+    """
+    directory = store_dir()
+    jobs = {}
+    stats = {"rendered": 0, "stored": 0, "failed": 0, "bytes": 0, "seconds": 0.0}
+    for html in documents:
+        key = pdf_key(html)
+        path = stored_path(key, directory)
+        if path.exists():
+            path.touch()
+            stats["stored"] += 1
+        elif key not in jobs:
+            jobs[key] = (key, html, str(directory))
+
+    if jobs:
+        # Only this command needs multiprocessing; keep it out of web startup.
+        from concurrent.futures import ProcessPoolExecutor
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for size in pool.map(convert_to_store, jobs.values()):
+                if size is None:
+                    stats["failed"] += 1
+                else:
+                    stats["rendered"] += 1
+                    stats["bytes"] += size
+        stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def prune_store(keep_days):
+    """
+    Delete stored PDFs not written or pre-rendered in `keep_days` days.
+    Returns the number of files deleted.
+    """
+    cutoff = time.time() - keep_days * 24 * 60 * 60
+    deleted = 0
+    for path in store_dir().glob("*/*.pdf"):
+        if path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            deleted += 1
+    return deleted
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+
+from .caching import bump_version_on_commit
+from .models import ArchivedWeek, Ingredient, MealPlanWeek, PlannedMeal, Recipe
+
+# Models read by cached pages and fragments. Receivers are connected per
+# model: a post_delete receiver makes Django fetch and signal every row
+# before deleting it, so listening to every model would turn off fast
+# deletes project-wide. RecipeNeighbor is only written in bulk, by
+# refresh_neighbors(), which bumps its version itself.
+CACHED_MODELS = (ArchivedWeek, Ingredient, MealPlanWeek, PlannedMeal, Recipe)
+
+
+def bump_planner_cache_version(sender, **kwargs):
+    """
+    Invalidate cached pages that read this model. Note that
+    QuerySet.update() sends no signals; call bump_version() after it.
+    """
+    bump_version_on_commit(sender._meta.model_name)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_planner_cache_version, sender=model, dispatch_uid=f"cache:save:{model._meta.model_name}")
+    post_delete.connect(bump_planner_cache_version, sender=model, dispatch_uid=f"cache:delete:{model._meta.model_name}")
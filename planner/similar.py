@@ -0,0 +1,157 @@
+"""
+"Recipes like this one" suggestions.
+
+Each recipe is a sparse TF-IDF vector over its normalized ingredient names
+and ingredient categories. Cosine similarities are computed offline
+(manage.py similarrecipes) through an inverted index, so only recipes
+sharing a distinctive term are ever compared, and the top neighbours of
+each recipe are stored in RecipeNeighbor for single-query lookups.
+"""
+import hashlib
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .caching import bump_version
+from .dedupe import normalize_ingredient
+from .models import Recipe, RecipeNeighbor, RecipeTermDigest
+
+TOP_K = 5
+
+# Terms found in more than this share of recipes (typically the categories)
+# still count towards similarity but are not used to find candidates.
+CANDIDATE_MAX_DF = 0.5
+
+
+def recipe_terms(recipe):
+    """
+    Term counts for a recipe; its ingredients should be prefetched.
+    """
+    terms = Counter()
+    for ing in recipe.ingredients.all():
+        name = normalize_ingredient(ing.name)
+        if name:
+            terms[f"ing:{name}"] += 1
+        terms[f"cat:{ing.category}"] += 1
+    return terms
+
+
+def terms_digest(terms):
+    text = "\n".join(f"{term}={count}" for term, count in sorted(terms.items()))
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class SimilarityIndex:
+    """
+    TF-IDF vectors for every recipe plus an inverted index over them.
+    """
+
+    def __init__(self, terms_by_recipe):
+        self.terms_by_recipe = terms_by_recipe
+        total = len(terms_by_recipe)
+
+        df = Counter()
+        for terms in terms_by_recipe.values():
+            df.update(terms.keys())
+        idf = {term: math.log((1 + total) / (1 + n)) + 1 for term, n in df.items()}
+
+        self.vectors = {}
+        self.postings = defaultdict(list)
+        # Never below 2: a term only one recipe has finds no candidates.
+        max_df = max(2, int(total * CANDIDATE_MAX_DF))
+        for recipe_id, terms in terms_by_recipe.items():
+            vector = {term: (1 + math.log(count)) * idf[term] for term, count in terms.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+            vector = {term: w / norm for term, w in vector.items()}
+            self.vectors[recipe_id] = vector
+            for term, weight in vector.items():
+                if df[term] <= max_df:
+                    self.postings[term].append((recipe_id, weight))
+
+    def scores(self, recipe_id):
+        """
+        Cosine similarity of `recipe_id` to every candidate, as a dict.
+        """
+        vector = self.vectors[recipe_id]
+        candidates = set()
+        for term in vector:
+            candidates.update(other for other, _ in self.postings.get(term, ()))
+        candidates.discard(recipe_id)
+
+        scores = {}
+        for other in candidates:
+            other_vector = self.vectors[other]
+            scores[other] = sum(w * other_vector.get(term, 0.0) for term, w in vector.items())
+        return scores
+
+    def top_neighbors(self, recipe_id, k=TOP_K):
+        scores = self.scores(recipe_id)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def similar_recipes(recipe_id):
+    """
+    Stored neighbours of a recipe, most similar first, in one query.
+    """
+    return RecipeNeighbor.objects.filter(recipe_id=recipe_id).select_related("neighbor")
+
+
+def load_index():
+    recipes = Recipe.objects.prefetch_related("ingredients")
+    return SimilarityIndex({recipe.pk: recipe_terms(recipe) for recipe in recipes})
+
+
+def refresh_neighbors(rebuild=False):
+    """
+    Recompute stored neighbours. Without `rebuild`, only recipes whose
+    ingredients changed since the last run are recomputed, plus the
+    recipes whose lists they now belong in or drop out of.
+    Returns the number of neighbour lists written.
+    """
+    index = load_index()
+    digests = {pk: terms_digest(terms) for pk, terms in index.terms_by_recipe.items()}
+
+    if rebuild:
+        stale = set(digests)
+    else:
+        stored = dict(RecipeTermDigest.objects.values_list("recipe_id", "digest"))
+        changed = {pk for pk, digest in digests.items() if stored.get(pk) != digest}
+
+        # Lists that contain a changed recipe, and lists a changed recipe
+        # may now beat the weakest entry of.
+        current = defaultdict(list)
+        for recipe_id, neighbor_id, score in RecipeNeighbor.objects.values_list(
+            "recipe_id", "neighbor_id", "score"
+        ):
+            current[recipe_id].append((neighbor_id, score))
+
+        stale = set(changed)
+        for pk in changed:
+            for other, score in index.scores(pk).items():
+                entries = current.get(other, [])
+                if len(entries) < TOP_K or score > min(s for _, s in entries):
+                    stale.add(other)
+        for recipe_id, entries in current.items():
+            if any(neighbor_id in changed for neighbor_id, _ in entries):
+                stale.add(recipe_id)
+        stale &= set(digests)
+
+    neighbors = [
+        RecipeNeighbor(recipe_id=pk, neighbor_id=other, score=score, rank=rank)
+        for pk in stale
+        for rank, (other, score) in enumerate(index.top_neighbors(pk))
+        if score > 0
+    ]
+
+    with transaction.atomic():
+        RecipeNeighbor.objects.filter(recipe_id__in=stale).delete()
+        RecipeNeighbor.objects.bulk_create(neighbors, batch_size=1000)
+        RecipeTermDigest.objects.filter(recipe_id__in=stale).delete()
+        RecipeTermDigest.objects.bulk_create(
+            (RecipeTermDigest(recipe_id=pk, digest=digests[pk]) for pk in stale),
+            batch_size=1000,
+        )
+        # bulk_create() sends no signals.
+        transaction.on_commit(lambda: bump_version("recipeneighbor"))
+    return len(stale)
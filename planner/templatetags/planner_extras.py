@@ -1,5 +1,7 @@
 from django import template
 
+from ..caching import cached_fragment
+
 register = template.Library()
 
 
@@ -9,3 +11,57 @@ def get_item(dictionary, key):
         return ""
     return dictionary.get(key, "")
 
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, model_names, vary_on, per_csrf):
+        self.nodelist = nodelist
+        self.name = name
+        self.model_names = model_names
+        self.vary_on = vary_on
+        self.per_csrf = per_csrf
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        model_names = [m.strip() for m in self.model_names.resolve(context).split(",")]
+        vary_on = [var.resolve(context) for var in self.vary_on]
+
+        if self.per_csrf:
+            # The fragment contains forms; only share it with the same visitor.
+            request = context.get("request")
+            csrf_secret = request.META.get("CSRF_COOKIE") if request else None
+            if not csrf_secret:
+                return self.nodelist.render(context)
+            vary_on.append(csrf_secret)
+
+        return cached_fragment(name, model_names, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache a template fragment until one of the listed models changes:
+
+        {% cachefragment "recipe_rows" "recipe" %}...{% endcachefragment %}
+        {% cachefragment "meal_rows" "plannedmeal,recipe" week.pk per_csrf %}...
+
+    Extra arguments are added to the key. Pass `per_csrf` last when the
+    fragment contains {% csrf_token %}.
+    """
+    bits = token.split_contents()
+    per_csrf = bits[-1] == "per_csrf"
+    if per_csrf:
+        bits = bits[:-1]
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name and a comma-separated list of models."
+        )
+
+    nodelist = parser.parse(("endcachefragment",))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+        per_csrf,
+    )
@@ -1,3 +1,1132 @@
-from django.test import TestCase
+import logging
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from .admin import EstimatedCountPaginator
+from .archive import archive_weeks, unarchive_weeks
+from .autobuild import AUTOBUILD_ATTEMPTS, AUTOBUILD_SLOTS, RECENT_DAYS, autobuild_week, explain_week
+from .caching import cache_stats, get_versions
+from .dedupe import (
+    DUPLICATE_THRESHOLD,
+    band_buckets,
+    find_duplicate_pairs,
+    find_similar,
+    ingredient_set,
+    minhash,
+    normalize_ingredient,
+    similarity,
+    update_signatures,
+)
+from .cloning import apply_slots, new_weeks, save_as_template, template_slots, week_slots
+from .models import (
+    MEAL_TYPES,
+    ArchivedWeek,
+    Ingredient,
+    MealPlanWeek,
+    PantryItem,
+    PlanTemplate,
+    PlannedMeal,
+    Recipe,
+    RecipeSignature,
+    ShoppingListItem,
+    ShoppingListSnapshot,
+)
+from .pantry import mark_purchased, restock, shopping_items
+from .similar import load_index, refresh_neighbors, similar_recipes
+from .utils import render_to_pdf
+from .views import create_shopping_list_snapshot
+
+
+# ---------- Cold start ----------
+
+# Import-time budgets in milliseconds, summed over top-level imports as
+# reported by `python -X importtime`. Both currently sit around 500ms.
+IMPORT_TIME_BUDGETS_MS = {
+    "manage.py check": 1000,
+    "wsgi startup": 1000,
+}
+
+# Modules that must stay out of startup; they are loaded on first PDF export.
+LAZY_MODULES = ("xhtml2pdf", "reportlab")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure_imports(args):
+    """
+    Run `python -X importtime <args>` from the project root.
+    Returns (total milliseconds, set of imported module names).
+    """
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "import-time-test")
+    env.pop("MEALPREP_PRELOAD_PDF", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        modules.add(module)
+        if not indent:
+            total_us += cumulative
+    return total_us / 1000, modules
+
+
+class ColdStartTests(SimpleTestCase):
+    commands = {
+        "manage.py check": ["manage.py", "check"],
+        "wsgi startup": ["-c", "import mealprep_site.wsgi"],
+    }
+
+    def test_startup_within_budget(self):
+        for name, args in self.commands.items():
+            with self.subTest(name):
+                total_ms, modules = measure_imports(args)
+
+                loaded = sorted(m for m in modules if m.split(".")[0] in LAZY_MODULES)
+                self.assertEqual(loaded, [], f"{name} imports the PDF stack")
+
+                budget = IMPORT_TIME_BUDGETS_MS[name]
+                self.assertLessEqual(
+                    total_ms, budget,
+                    f"{name} took {total_ms:.0f}ms of imports (budget {budget}ms)",
+                )
+
+
+# ---------- Caching ----------
+
+
+class CachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Versions are bumped on commit; run those callbacks like a request would.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+
+    def test_tests_do_not_share_the_site_cache(self):
+        # cache.clear() here must never reach the running site's file cache.
+        self.assertEqual(
+            settings.CACHES["default"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache"
+        )
+
+    def test_response_cached_until_model_changes(self):
+        url = f"/recipes/{self.recipe.pk}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(recipe=self.recipe, name="Beans", category="pantry")
+        self.assertContains(self.client.get(url), "Beans")
+
+        stats = cache_stats()["view:recipe_detail"]
+        self.assertEqual(stats, {"hits": 1, "misses": 2})
+
+    def test_bulk_delete_bumps_version_once_on_commit(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=self.recipe, name=f"Spice {i}", category="pantry") for i in range(50)
+        )
+        with mock.patch("planner.caching.bump_version") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                Ingredient.objects.filter(recipe=self.recipe).delete()
+                bump.assert_not_called()
+        bump.assert_called_once_with("ingredient")
+
+    def test_uncached_models_keep_fast_deletes(self):
+        self.assertFalse(post_delete.has_listeners(Session))
+        self.assertFalse(post_delete.has_listeners(ShoppingListItem))
+
+        snapshot = ShoppingListSnapshot.objects.create()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(snapshot=snapshot, category="pantry", label=f"Item {i}") for i in range(500)
+        )
+        # Items and week links go in one DELETE each, not row by row.
+        with self.assertNumQueries(3):
+            snapshot.delete()
+
+    def test_cached_forms_keep_a_valid_csrf_token(self):
+        week = MealPlanWeek.objects.create(label="Week 1")
+        meal = PlannedMeal.objects.create(week=week, slot_name="Lunch", recipe=self.recipe)
+        url = f"/mealplans/{week.pk}/"
+
+        for _ in range(2):
+            client = self.client_class(enforce_csrf_checks=True)
+            client.get(url)  # mints the CSRF cookie, never cached
+            client.get(url)
+            html = client.get(url).content.decode()
+            token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html).group(1)
+
+            response = client.post(
+                f"/meals/{meal.pk}/toggle-skip/", {"csrfmiddlewaretoken": token}
+            )
+            self.assertEqual(response.status_code, 302)
+
+
+# ---------- Autobuild under concurrency ----------
+
+def run_autobuild(week_pk):
+    return len(autobuild_week(week_pk))
+
+
+class AutobuildRetryTests(SimpleTestCase):
+    def build(self, error):
+        with mock.patch("planner.autobuild.build_week", side_effect=error) as build_week, \
+                mock.patch("planner.autobuild.time.sleep"), \
+                self.assertRaises(OperationalError):
+            autobuild_week(1)
+        return build_week.call_count
+
+    def test_only_lock_errors_are_retried(self):
+        self.assertEqual(self.build(OperationalError("database is locked")), AUTOBUILD_ATTEMPTS)
+        self.assertEqual(self.build(OperationalError("no such table: planner_recipe")), 1)
+
+
+class ConcurrentAutobuildTests(TransactionTestCase):
+    weeks = 100
+    builds_per_week = 3
+    processes = 8
+    min_builds_per_second = 20
+
+    def setUp(self):
+        # One log line per slot for 300 builds is just noise here.
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_concurrent_autobuilds(self):
+        builds = self.weeks * self.builds_per_week
+        Recipe.objects.bulk_create(
+            Recipe(name=f"{meal_type} {i}", meal_type=meal_type, course_count=course_count)
+            for _, meal_type, course_count in AUTOBUILD_SLOTS
+            for i in range(builds)
+        )
+        week_pks = [
+            MealPlanWeek.objects.create(label=f"Week {i}").pk for i in range(self.weeks)
+        ]
+        jobs = week_pks * self.builds_per_week
+
+        # Children must open their own connections to the test database.
+        connections.close_all()
+        started = time.perf_counter()
+        with multiprocessing.get_context("fork").Pool(self.processes) as pool:
+            created = pool.map(run_autobuild, jobs, chunksize=1)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(created, [len(AUTOBUILD_SLOTS)] * len(jobs))
+
+        # Every week ends up with exactly one meal per slot.
+        slot_names = sorted(slot for slot, _, _ in AUTOBUILD_SLOTS)
+        for week_pk in week_pks:
+            meals = PlannedMeal.objects.filter(week_id=week_pk).order_by("slot_name")
+            self.assertEqual([m.slot_name for m in meals], slot_names)
+
+        # No two builds reserved the same recipe.
+        self.assertEqual(
+            Recipe.objects.filter(last_used__isnull=False).count(),
+            len(jobs) * len(AUTOBUILD_SLOTS),
+        )
+        self.assertEqual(
+            PlannedMeal.objects.values("recipe").distinct().count(),
+            PlannedMeal.objects.count(),
+        )
+
+        rate = len(jobs) / elapsed
+        self.assertGreaterEqual(
+            rate, self.min_builds_per_second,
+            f"{len(jobs)} autobuilds took {elapsed:.1f}s ({rate:.0f}/s)",
+        )
+
+
+class AutobuildExplainTests(TestCase):
+    def setUp(self):
+        self.week = MealPlanWeek.objects.create(label="Week", start_date=date(2026, 3, 2))
+        recent = self.week.start_date - timedelta(days=RECENT_DAYS - 1)
+        # Lunch only has a recently used recipe; there is no seafood at all.
+        Recipe.objects.create(name="Soup", meal_type="lunch", course_count=8, last_used=recent)
+        Recipe.objects.create(name="Curry", meal_type="vegetarian", course_count=4)
+        Recipe.objects.create(name="Chili", meal_type="vegetarian", course_count=4, last_used=recent)
+        Recipe.objects.create(name="Roast", meal_type="protein", course_count=4)
+
+    def test_explain_reports_pools_without_writing(self):
+        report = explain_week(self.week.pk)
+
+        self.assertFalse(PlannedMeal.objects.exists())
+        self.assertEqual(Recipe.objects.filter(last_used=self.week.start_date).count(), 0)
+        picks = {
+            slot["slot"]: (slot["recipe"], slot["pool"], slot["fresh"], slot["fallback"])
+            for slot in report.slots
+        }
+        self.assertEqual(picks, {
+            "Lunch": ("Soup", 1, 0, True),
+            "Vegetarian Dinner": ("Curry", 2, 1, False),
+            "Protein Dinner": ("Roast", 1, 1, False),
+            "Seafood Dinner": (None, 0, 0, True),
+        })
+        self.assertEqual(report.total_queries, sum(step["queries"] for step in report.steps))
+
+    def test_builds_log_every_slot(self):
+        with self.assertLogs("planner.autobuild", "INFO") as logs:
+            autobuild_week(self.week.pk)
+
+        slots = [r.autobuild for r in logs.records if "slot" in r.autobuild]
+        self.assertEqual([slot["slot"] for slot in slots], [name for name, _, _ in AUTOBUILD_SLOTS])
+        starved = [r.autobuild["slot"] for r in logs.records if r.levelno == logging.WARNING]
+        self.assertEqual(starved, ["Seafood Dinner"])
+        summary = logs.records[-1].autobuild
+        self.assertEqual((summary["meals"], summary["dry_run"]), (3, False))
+
+
+# ---------- PDF store ----------
+
+def use_temporary_pdf_store(test):
+    """
+    Point MEALPREP_PDF_DIR at a directory removed after the test.
+    """
+    directory = test.enterContext(tempfile.TemporaryDirectory())
+    test.enterContext(override_settings(MEALPREP_PDF_DIR=directory))
+    return directory
+
+
+class PrerenderPdfTests(TestCase):
+    def setUp(self):
+        self.store = use_temporary_pdf_store(self)
+        self.week = MealPlanWeek.objects.create(label="This week", start_date=date.today())
+        self.recipe = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+        Ingredient.objects.create(recipe=self.recipe, name="Beans", amount="1 can", category="pantry")
+        PlannedMeal.objects.create(week=self.week, slot_name="Dinner", recipe=self.recipe)
+
+        # Neither a skipped meal nor an archived week is pre-rendered.
+        skipped = Recipe.objects.create(name="Soup", course_count=8, meal_type="lunch")
+        PlannedMeal.objects.create(week=self.week, slot_name="Lunch", recipe=skipped, skipped=True)
+        archived = MealPlanWeek.objects.create(label="Old", start_date=date.today(), archived=True)
+        PlannedMeal.objects.create(week=archived, slot_name="Lunch", recipe=skipped)
+
+    def test_prerendered_pdfs_are_served_from_the_store(self):
+        out = StringIO()
+        call_command("prerenderpdfs", workers=2, stdout=out)
+        self.assertIn("Rendered 2 PDF(s)", out.getvalue())
+        self.assertEqual(len(list(Path(self.store).glob("*/*.pdf"))), 2)
+
+        with mock.patch("planner.utils.html_to_pdf", side_effect=AssertionError("converted again")):
+            recipe_pdf = self.client.get(reverse("planner:recipe_pdf", kwargs={"pk": self.recipe.pk}))
+            shopping_pdf = self.client.post(reverse("planner:shopping_list_pdf"), {"weeks": [self.week.pk]})
+        self.assertTrue(recipe_pdf.content.startswith(b"%PDF"))
+        self.assertTrue(shopping_pdf.content.startswith(b"%PDF"))
+
+        call_command("prerenderpdfs", stdout=out)
+        self.assertIn("2 already stored", out.getvalue())
+
+
+# ---------- Shopping lists ----------
+
+class ShoppingListTests(TestCase):
+    def setUp(self):
+        use_temporary_pdf_store(self)
+        cache.clear()
+        self.week = MealPlanWeek.objects.create(label="Week")
+        recipe = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+        for name, category in (("Beans", "pantry"), ("Onion", "produce"), ("Beef", "protein")):
+            Ingredient.objects.create(recipe=recipe, name=name, amount="1", category=category)
+        PlannedMeal.objects.create(week=self.week, slot_name="Dinner", recipe=recipe)
+        self.snapshot = create_shopping_list_snapshot([self.week.pk])
+        self.items = list(self.snapshot.items.all())
+
+    def test_set_checked_bumps_version_only_on_change(self):
+        self.assertEqual([item.label for item in self.items], ["1 – Beans", "1 – Onion", "1 – Beef"])
+        self.assertFalse(self.snapshot.set_checked([item.pk for item in self.items]))
+        self.assertEqual(self.snapshot.version, 1)
+
+        self.assertTrue(self.snapshot.set_checked([self.items[0].pk, "junk"]))
+        self.assertEqual(self.snapshot.version, 2)
+        self.assertEqual(
+            [item.label for item in self.snapshot.items_by_category(checked_only=True)["pantry"]],
+            ["1 – Beans"],
+        )
+        self.assertEqual(self.snapshot.items.filter(checked=True).count(), 1)
+
+    def test_unchanged_list_is_reused(self):
+        again = create_shopping_list_snapshot([str(self.week.pk)])
+        self.assertEqual(again.pk, self.snapshot.pk)
+
+        # Once it has been edited, or the list itself changes, a new one is made.
+        self.snapshot.set_checked([])
+        edited = create_shopping_list_snapshot([self.week.pk])
+        self.assertNotEqual(edited.pk, self.snapshot.pk)
+        PantryItem.objects.create(name="beans", category="pantry", quantity=1)
+        self.assertNotEqual(create_shopping_list_snapshot([self.week.pk]).pk, edited.pk)
+
+    def test_snapshot_page_saves_checked_items(self):
+        url = reverse("planner:shopping_list_snapshot", kwargs={"pk": self.snapshot.pk})
+        self.assertContains(self.client.get(url), "1 – Onion")
+
+        response = self.client.post(url, {"items": [self.items[1].pk]})
+        self.assertRedirects(response, url)
+        self.assertEqual(
+            list(self.snapshot.items.filter(checked=True).values_list("label", flat=True)),
+            ["1 – Onion"],
+        )
+
+    def test_pdf_is_cached_per_version(self):
+        url = reverse("planner:shopping_list_snapshot_pdf", kwargs={"pk": self.snapshot.pk})
+        with mock.patch("planner.views.render_to_pdf", wraps=render_to_pdf) as render:
+            first = self.client.get(url)
+            reprint = self.client.get(url)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.content, reprint.content)
+
+            self.snapshot.set_checked([self.items[0].pk])
+            self.client.get(url)
+            self.assertEqual(render.call_count, 2)
+        self.assertTrue(first.content.startswith(b"%PDF"))
+
+    def test_pdf_rejects_bad_snapshot_ids(self):
+        url = reverse("planner:shopping_list_pdf")
+        self.assertEqual(self.client.post(url, {"snapshot": "abc"}).status_code, 404)
+        self.assertEqual(self.client.post(url, {"snapshot": "999999"}).status_code, 404)
+
+
+# ---------- Pantry ----------
+
+class PantryTests(TestCase):
+    def setUp(self):
+        self.week = MealPlanWeek.objects.create(label="Week")
+        chili = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+        stew = Recipe.objects.create(name="Stew", course_count=4, meal_type="protein")
+        Ingredient.objects.create(recipe=chili, name="Beans", amount="1 can", category="pantry")
+        Ingredient.objects.create(recipe=chili, name="Salt", amount="1 tsp", category="spices")
+        Ingredient.objects.create(recipe=stew, name="Beans", amount="2 cans", category="pantry")
+        Ingredient.objects.create(recipe=stew, name="Pepper", amount="1 tsp", category="spices")
+        for recipe in (chili, chili, stew):
+            PlannedMeal.objects.create(week=self.week, slot_name="Dinner", recipe=recipe)
+
+    def quantities(self):
+        return [(item["label"], item["quantity"]) for item in shopping_items([self.week.pk])]
+
+    def test_stock_is_shared_across_amounts(self):
+        self.assertEqual(self.quantities(), [
+            ("1 can – Beans", 2), ("2 cans – Beans", 1), ("1 tsp – Pepper", 1), ("1 tsp – Salt", 2),
+        ])
+
+        # Three meals need beans; stock for two covers the first amount only.
+        PantryItem.objects.create(name="beans", quantity=2)
+        self.assertEqual(self.quantities()[:1], [("2 cans – Beans", 1)])
+
+        # Stock left over from one amount carries into the next.
+        PantryItem.objects.filter(name="beans").update(quantity=1)
+        self.assertEqual(self.quantities()[:2], [("1 can – Beans", 1), ("2 cans – Beans", 1)])
+
+        PantryItem.objects.filter(name="beans").update(quantity=5)
+        self.assertEqual(self.quantities()[0], ("1 tsp – Pepper", 1))
+
+    def test_category_stock_covers_each_name(self):
+        PantryItem.objects.create(category="spices", quantity=1)
+        self.assertEqual(self.quantities()[-1:], [("1 tsp – Salt", 1)])
+
+        # Stock under the name wins over the category-wide row.
+        PantryItem.objects.create(name="salt", category="spices", quantity=2)
+        self.assertEqual(self.quantities(), [("1 can – Beans", 2), ("2 cans – Beans", 1)])
+
+    def test_restock_updates_and_inserts(self):
+        PantryItem.objects.create(name="beans", category="pantry", quantity=1)
+        snapshot = ShoppingListSnapshot.objects.create()
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(snapshot=snapshot, category="pantry", label="Beans", name="Beans", quantity=2),
+            ShoppingListItem(snapshot=snapshot, category="pantry", label="Beans", name=" beans", quantity=1),
+            ShoppingListItem(snapshot=snapshot, category="spices", label="Salt", name="Salt", quantity=1),
+            ShoppingListItem(snapshot=snapshot, category="spices", label="Pepper", name="Pepper", checked=False),
+        ])
+        self.assertEqual(restock(snapshot.items.none()), 0)
+
+        self.assertTrue(mark_purchased(snapshot))
+        self.assertIsNotNone(snapshot.purchased_at)
+        self.assertEqual(
+            list(PantryItem.objects.order_by("name").values_list("name", "category", "quantity")),
+            [("beans", "pantry", 4), ("salt", "spices", 1)],
+        )
+
+        # A second "purchased" does not restock again.
+        self.assertFalse(mark_purchased(snapshot))
+        self.assertEqual(PantryItem.objects.get(name="beans").quantity, 4)
+
+    def test_restock_adds_to_one_row_per_name(self):
+        loose = PantryItem.objects.create(name="rice", quantity=1)
+        shelved = PantryItem.objects.create(name="rice", category="pantry", quantity=1)
+        snapshot = ShoppingListSnapshot.objects.create()
+        item = ShoppingListItem.objects.create(
+            snapshot=snapshot, category="pantry", label="Rice", name="Rice", quantity=2
+        )
+
+        # The row in the item's category gets the purchase...
+        restock([item])
+        loose.refresh_from_db()
+        shelved.refresh_from_db()
+        self.assertEqual((loose.quantity, shelved.quantity), (1, 3))
+
+        # ...otherwise the oldest row with the name does.
+        item.category = "produce"
+        restock([item])
+        loose.refresh_from_db()
+        shelved.refresh_from_db()
+        self.assertEqual((loose.quantity, shelved.quantity), (3, 3))
+
+    def test_pantry_form_rejects_names_differing_only_in_case(self):
+        PantryItem.objects.create(name="rice", quantity=1)
+        data = {
+            "form-TOTAL_FORMS": "1",
+            "form-INITIAL_FORMS": "0",
+            "form-0-name": " Rice ",
+            "form-0-category": "",
+            "form-0-quantity": "2",
+        }
+        response = self.client.post(reverse("planner:pantry"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["formset"].errors[0])
+        self.assertEqual(PantryItem.objects.count(), 1)
+
+        data["form-0-category"] = "pantry"
+        self.assertRedirects(self.client.post(reverse("planner:pantry"), data), reverse("planner:pantry"))
+        self.assertTrue(PantryItem.objects.filter(name="rice", category="pantry").exists())
+
+
+# ---------- Cold storage ----------
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.week = MealPlanWeek.objects.create(label="Week")
+        self.chili = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+        self.soup = Recipe.objects.create(name="Soup", course_count=8, meal_type="lunch")
+        PlannedMeal.objects.create(week=self.week, slot_name="Dinner", recipe=self.chili)
+        PlannedMeal.objects.create(week=self.week, slot_name="Lunch", recipe=self.soup, skipped=True)
+
+    def meals(self):
+        return list(self.week.meals.order_by("slot_name").values_list("slot_name", "recipe_id", "skipped"))
+
+    def test_round_trip_keeps_meals(self):
+        before = self.meals()
+        self.assertEqual(archive_weeks([self.week.pk]), 1)
+        self.assertEqual(self.meals(), [])
+        self.assertEqual(archive_weeks([self.week.pk]), 0)  # already in cold storage
+
+        self.assertEqual(unarchive_weeks([self.week.pk]), 1)
+        self.assertEqual(self.meals(), before)
+        self.assertFalse(ArchivedWeek.objects.exists())
+
+    def test_unarchive_drops_deleted_recipes(self):
+        archive_weeks([self.week.pk])
+        self.soup.delete()
+        unarchive_weeks([self.week.pk])
+        self.assertEqual(self.meals(), [("Dinner", self.chili.pk, False)])
+
+    def test_compactarchive_moves_live_meals_of_archived_weeks(self):
+        MealPlanWeek.objects.filter(pk=self.week.pk).update(archived=True)
+        out = StringIO()
+        call_command("compactarchive", stdout=out)
+        self.assertIn("Compacted 1 archived week(s).", out.getvalue())
+        self.assertEqual(self.meals(), [])
+        self.assertEqual(ArchivedWeek.objects.get(week=self.week).meal_count, 2)
+
+    def test_archived_weeks_reject_new_meals(self):
+        archive_weeks([self.week.pk])
+        detail = self.client.get(reverse("planner:mealplan_week_detail", kwargs={"pk": self.week.pk}))
+        self.assertNotContains(detail, "Quick Add")
+        self.assertContains(detail, "Soup")
+
+        url = reverse("planner:planned_meal_create", kwargs={"week_pk": self.week.pk})
+        response = self.client.post(url, {"slot_name": "Extras", "recipe": self.chili.pk})
+        self.assertRedirects(response, reverse("planner:mealplan_week_detail", kwargs={"pk": self.week.pk}))
+        self.assertEqual(self.meals(), [])
+
+
+# ---------- Cloning and templates ----------
+
+class ClonePlanTests(TestCase):
+    def setUp(self):
+        self.week = MealPlanWeek.objects.create(label="Source", start_date=date(2026, 1, 5))
+        self.chili = Recipe.objects.create(
+            name="Chili", course_count=4, meal_type="protein", last_used=date(2026, 1, 5)
+        )
+        self.soup = Recipe.objects.create(
+            name="Soup", course_count=8, meal_type="lunch", last_used=date(2026, 6, 1)
+        )
+        PlannedMeal.objects.create(week=self.week, slot_name="Dinner", recipe=self.chili)
+        PlannedMeal.objects.create(week=self.week, slot_name="Lunch", recipe=self.soup, skipped=True)
+
+    def meals(self, week):
+        return list(week.meals.order_by("slot_name").values_list("slot_name", "recipe_id", "skipped"))
+
+    def test_slots_are_copied_to_existing_and_new_weeks(self):
+        target = MealPlanWeek.objects.create(label="Target")
+        PlannedMeal.objects.create(week=target, slot_name="Extras", recipe=self.chili)
+
+        weeks = apply_slots(
+            week_slots(self.week), [target], create=new_weeks(2, date(2026, 3, 2))
+        )
+        self.assertEqual(len(weeks), 3)
+        self.assertEqual([w.label for w in weeks[1:]], ["Week of Mar 02", "Week of Mar 09"])
+        for week in weeks[1:]:
+            self.assertEqual(self.meals(week), self.meals(self.week))
+        self.assertEqual(self.meals(target), sorted([("Extras", self.chili.pk, False)] + self.meals(self.week)))
+
+    def test_replace_removes_existing_meals(self):
+        target = MealPlanWeek.objects.create(label="Target")
+        PlannedMeal.objects.create(week=target, slot_name="Extras", recipe=self.chili)
+        apply_slots(week_slots(self.week), [target], replace=True)
+        self.assertEqual(self.meals(target), self.meals(self.week))
+
+    def test_last_used_only_moves_forward(self):
+        target = MealPlanWeek.objects.create(label="Target", start_date=date(2026, 3, 2))
+        apply_slots(week_slots(self.week), [target], update_last_used=True)
+        self.chili.refresh_from_db()
+        self.soup.refresh_from_db()
+        self.assertEqual(self.chili.last_used, date(2026, 3, 2))
+        self.assertEqual(self.soup.last_used, date(2026, 6, 1))
+
+    def test_deleted_recipes_are_dropped_from_cold_storage(self):
+        archive_weeks([self.week.pk])
+        self.week.refresh_from_db()
+        self.soup.delete()
+        self.assertEqual(week_slots(self.week), [("Dinner", self.chili.pk, False)])
+
+        response = self.client.post(
+            reverse("planner:mealplan_week_save_template", kwargs={"pk": self.week.pk}),
+            {"name": "Leftovers"},
+        )
+        self.assertRedirects(response, reverse("planner:plan_template_list"))
+        self.assertEqual(template_slots(PlanTemplate.objects.get(name="Leftovers")), week_slots(self.week))
+
+        response = self.client.post(
+            reverse("planner:mealplan_week_clone", kwargs={"pk": self.week.pk}),
+            {"new_weeks": 1, "first_start_date": "2026-03-02"},
+        )
+        self.assertRedirects(response, reverse("planner:mealplan_week_list"))
+        clone = MealPlanWeek.objects.get(start_date=date(2026, 3, 2))
+        self.assertEqual(self.meals(clone), [("Dinner", self.chili.pk, False)])
+
+
+# ---------- Duplicate recipes ----------
+
+CHILI = ["Black Beans, rinsed", "Onion", "Ground beef", "Diced tomatoes", "Chili powder", "Cumin"]
+
+
+class DuplicateRecipeTests(TestCase):
+    def add_recipe(self, name, ingredient_names):
+        recipe = Recipe.objects.create(name=name, course_count=4, meal_type="protein")
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=recipe, name=ing, category="pantry") for ing in ingredient_names
+        )
+        return recipe
+
+    def test_minhash_estimates_ingredient_overlap(self):
+        self.assertEqual(normalize_ingredient("Black Beans, rinsed"), "black beans rinsed")
+        chili = minhash(ingredient_set(CHILI))
+        self.assertEqual(similarity(chili, minhash(ingredient_set(n.upper() for n in CHILI))), 1.0)
+        self.assertEqual(band_buckets(chili), band_buckets(list(chili)))
+
+        # 6 of 7 ingredients shared: Jaccard 0.86.
+        close = minhash(ingredient_set(CHILI + ["Bell pepper"]))
+        self.assertGreater(similarity(chili, close), DUPLICATE_THRESHOLD)
+        unrelated = minhash(ingredient_set(["Rice", "Salmon", "Soy sauce", "Nori"]))
+        self.assertLess(similarity(chili, unrelated), 0.2)
+        self.assertIsNone(minhash(set()))
+
+    def test_similar_recipes_are_found_and_unrelated_are_not(self):
+        chili = self.add_recipe("Chili", CHILI)
+        sushi = self.add_recipe("Sushi bowl", ["Rice", "Salmon", "Soy sauce", "Nori"])
+        update_signatures(Recipe.objects.prefetch_related("ingredients"))
+
+        matches = find_similar(CHILI + ["Bell pepper"])
+        self.assertEqual([recipe for recipe, _ in matches], [chili])
+        self.assertEqual(find_similar(CHILI, exclude_pk=chili.pk), [])
+        self.assertEqual(find_similar(["Rice", "Salmon", "Soy sauce", "Nori"])[0][0], sushi)
+
+        twin = self.add_recipe("Texas chili", [n.lower() for n in CHILI])
+        update_signatures(Recipe.objects.filter(pk=twin.pk).prefetch_related("ingredients"))
+        self.assertEqual(
+            [(a.name, b.name, score) for a, b, score in find_duplicate_pairs()],
+            [("Chili", "Texas chili", 1.0)],
+        )
+
+    def test_finddupes_command(self):
+        self.add_recipe("Chili", CHILI)
+        twin = self.add_recipe("Texas chili", CHILI[:-1] + ["Paprika"])
+        out = StringIO()
+        call_command("finddupes", stdout=out)
+        self.assertIn("Updated 2 signature(s).", out.getvalue())
+        self.assertIn("1 likely duplicate pair(s).", out.getvalue())
+
+        # Stored signatures go stale when ingredients are edited outside the views.
+        twin.ingredients.all().delete()
+        Ingredient.objects.create(recipe=twin, name="Lettuce", category="produce")
+        out = StringIO()
+        call_command("finddupes", stdout=out)
+        self.assertIn("1 likely duplicate pair(s).", out.getvalue())
+        out = StringIO()
+        call_command("finddupes", "--rebuild", stdout=out)
+        self.assertIn("Updated 2 signature(s).", out.getvalue())
+        self.assertIn("0 likely duplicate pair(s).", out.getvalue())
+
+    def test_saving_a_duplicate_warns(self):
+        chili = self.add_recipe("Chili", CHILI)
+        update_signatures(Recipe.objects.prefetch_related("ingredients"))
+        data = {
+            "name": "Weeknight chili",
+            "course_count": 4,
+            "meal_type": "protein",
+            "source_note": "",
+            "ingredients-TOTAL_FORMS": len(CHILI),
+            "ingredients-INITIAL_FORMS": 0,
+            "ingredients-MIN_NUM_FORMS": 0,
+            "ingredients-MAX_NUM_FORMS": 1000,
+        }
+        for i, name in enumerate(CHILI):
+            data[f"ingredients-{i}-name"] = name
+            data[f"ingredients-{i}-category"] = "pantry"
+
+        response = self.client.post(reverse("planner:recipe_create"), data, follow=True)
+        self.assertContains(response, f"This looks like &quot;{chili.name}&quot;")
+        self.assertTrue(RecipeSignature.objects.filter(recipe__name="Weeknight chili").exists())
+
+
+# ---------- Similar recipes ----------
+
+class SimilarRecipeTests(TestCase):
+    def add_recipe(self, name, ingredient_names):
+        recipe = Recipe.objects.create(name=name, course_count=4, meal_type="protein")
+        self.set_ingredients(recipe, ingredient_names)
+        return recipe
+
+    def set_ingredients(self, recipe, ingredient_names):
+        recipe.ingredients.all().delete()
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=recipe, name=ing, category="pantry") for ing in ingredient_names
+        )
+
+    def neighbors(self, recipe):
+        return [n.neighbor.name for n in similar_recipes(recipe.pk).order_by("rank")]
+
+    def test_small_collections_still_find_neighbors(self):
+        chili = self.add_recipe("Chili", ["Beans", "Onion", "Beef", "Tomatoes", "Chili powder"])
+        self.add_recipe("Chili 2", ["Beans", "Onion", "Beef", "Tomatoes", "Cumin"])
+        self.add_recipe("Sushi", ["Rice", "Salmon", "Soy sauce", "Nori"])
+        refresh_neighbors(rebuild=True)
+        self.assertEqual(self.neighbors(chili), ["Chili 2"])
+
+    def add_collection(self):
+        """
+        Six recipes, so that beans and onion (in three of them) are still
+        distinctive enough to find candidates by.
+        """
+        return [
+            self.add_recipe("Chili", ["Beans", "Onion", "Beef", "Tomatoes", "Chili powder"]),
+            self.add_recipe("Chili 2", ["Beans", "Onion", "Beef", "Tomatoes", "Cumin"]),
+            self.add_recipe("Bean soup", ["Beans", "Onion", "Stock", "Carrots"]),
+            self.add_recipe("Sushi", ["Rice", "Salmon", "Soy sauce", "Nori"]),
+            self.add_recipe("Salad", ["Lettuce", "Cucumber", "Dressing"]),
+            self.add_recipe("Pancakes", ["Flour", "Eggs", "Milk"]),
+        ]
+
+    def test_neighbors_are_ranked_by_tf_idf_similarity(self):
+        chili, _, _, sushi, _, pancakes = self.add_collection()
+        self.assertEqual(refresh_neighbors(rebuild=True), 6)
+        self.assertEqual(self.neighbors(chili), ["Chili 2", "Bean soup"])
+        self.assertEqual(self.neighbors(pancakes), [])
+
+        scores = load_index().scores(chili.pk)
+        self.assertNotIn(sushi.pk, scores)  # nothing distinctive in common
+        self.assertTrue(all(0 < score <= 1 for score in scores.values()))
+
+    def test_incremental_refresh(self):
+        chili, chili2, soup, sushi, salad, _ = self.add_collection()
+        refresh_neighbors(rebuild=True)
+        self.assertEqual(refresh_neighbors(), 0)
+
+        # The soup turns into a rice bowl: it drops out of both chili lists
+        # and enters the sushi and salad lists.
+        self.set_ingredients(soup, ["Rice", "Salmon", "Nori", "Cucumber"])
+        self.assertEqual(refresh_neighbors(), 5)
+        self.assertEqual(self.neighbors(chili), ["Chili 2"])
+        self.assertEqual(self.neighbors(chili2), ["Chili"])
+        self.assertEqual(self.neighbors(sushi), ["Bean soup"])
+        self.assertEqual(self.neighbors(salad), ["Bean soup"])
+        self.assertEqual(self.neighbors(soup), ["Sushi", "Salad"])
+
+        # A new recipe enters the lists it resembles; the rest are untouched.
+        self.add_recipe("Texas chili", ["Beans", "Onion", "Beef", "Tomatoes", "Chili powder"])
+        self.assertEqual(refresh_neighbors(), 3)
+        self.assertEqual(self.neighbors(chili), ["Texas chili", "Chili 2"])
+        self.assertEqual(self.neighbors(sushi), ["Bean soup"])
+
+    def test_like_suggests_similar_recipes(self):
+        week = MealPlanWeek.objects.create(label="Week")
+        chili = self.add_recipe("Chili", ["Beans", "Onion", "Beef", "Tomatoes", "Chili powder"])
+        self.add_recipe("Chili 2", ["Beans", "Onion", "Beef", "Tomatoes", "Cumin"])
+        self.add_recipe("Sushi", ["Rice", "Salmon", "Soy sauce", "Nori"])
+        refresh_neighbors(rebuild=True)
+
+        # The week page links each meal to suggestions for the same slot.
+        PlannedMeal.objects.create(week=week, slot_name="Monday Dinner", recipe=chili)
+        url = reverse("planner:planned_meal_create", kwargs={"week_pk": week.pk})
+        week_page = self.client.get(reverse("planner:mealplan_week_detail", kwargs={"pk": week.pk}))
+        self.assertContains(week_page, f"{url}?like={chili.pk}&amp;slot_name=Monday%20Dinner")
+
+        response = self.client.get(url, {"like": chili.pk, "slot_name": "Monday Dinner"})
+        self.assertContains(response, "Recipes like Chili")
+        self.assertContains(response, "Chili 2 – ")
+        self.assertContains(response, 'name="slot_name" value="Monday Dinner"')
+        self.assertNotContains(response, "Sushi – ")
+        self.assertNotContains(self.client.get(url, {"like": "nope"}), "Recipes like")
+
+
+# ---------- Admin ----------
+
+class AdminTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+        self.recipe = Recipe.objects.create(name="Chili", course_count=4, meal_type="protein")
+
+    def run_action(self, model_name, action, objects):
+        return self.client.post(
+            reverse(f"admin:planner_{model_name}_changelist"),
+            {"action": action, "_selected_action": [obj.pk for obj in objects]},
+        )
+
+    def test_archive_and_unarchive_actions(self):
+        week = MealPlanWeek.objects.create(label="Week")
+        PlannedMeal.objects.create(week=week, slot_name="Dinner", recipe=self.recipe)
+
+        self.run_action("mealplanweek", "archive_weeks", [week])
+        week.refresh_from_db()
+        self.assertTrue(week.archived)
+        self.assertFalse(week.meals.exists())
+        self.assertEqual(ArchivedWeek.objects.get(week=week).meal_count, 1)
+
+        self.run_action("mealplanweek", "unarchive_weeks", [week])
+        week.refresh_from_db()
+        self.assertFalse(week.archived)
+        self.assertEqual(list(week.meals.values_list("slot_name", flat=True)), ["Dinner"])
+
+    def test_change_form_cannot_unarchive(self):
+        week = MealPlanWeek.objects.create(label="Week")
+        archive_weeks([week.pk])
+        url = reverse("admin:planner_mealplanweek_change", args=[week.pk])
+        response = self.client.post(url, {"label": "Renamed", "start_date": "", "skipped": ""})
+        self.assertEqual(response.status_code, 302)
+
+        week.refresh_from_db()
+        self.assertEqual(week.label, "Renamed")
+        self.assertTrue(week.archived)
+        self.assertTrue(ArchivedWeek.objects.filter(week=week).exists())
+
+    def test_reset_last_used_action(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(last_used=date(2026, 1, 5))
+        before = get_versions(["recipe"])
+        self.run_action("recipe", "reset_last_used", [self.recipe])
+        self.recipe.refresh_from_db()
+        self.assertIsNone(self.recipe.last_used)
+        self.assertNotEqual(get_versions(["recipe"]), before)
+
+    def test_prefix_search_uses_nocase_index(self):
+        self.assertIn("planner_recipe_name_nocase", Recipe.objects.filter(name__istartswith="chi").explain())
+        self.assertIn("planner_meal_slot_nocase", PlannedMeal.objects.filter(slot_name__istartswith="din").explain())
+        response = self.client.get(reverse("admin:planner_recipe_changelist"), {"q": "CHI"})
+        self.assertContains(response, "Chili")
+
+    def test_unfiltered_counts_are_estimated(self):
+        Recipe.objects.bulk_create(
+            Recipe(name=f"Soup {i}", course_count=8, meal_type="lunch") for i in range(10)
+        )
+        with mock.patch("planner.admin.ESTIMATED_COUNT_THRESHOLD", 5):
+            with CaptureQueriesContext(connection) as queries:
+                estimate = EstimatedCountPaginator(Recipe.objects.all(), 100).count
+            filtered = EstimatedCountPaginator(Recipe.objects.filter(meal_type="lunch"), 100).count
+        self.assertGreaterEqual(estimate, 11)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        self.assertEqual(filtered, 10)
+
+    def test_large_ingredient_lists_are_linked_not_inlined(self):
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=self.recipe, name=f"Spice {i}", category="pantry") for i in range(3)
+        )
+        url = reverse("admin:planner_recipe_change", args=[self.recipe.pk])
+        self.assertContains(self.client.get(url), "ingredients-TOTAL_FORMS")
+
+        with mock.patch("planner.admin.INGREDIENT_INLINE_LIMIT", 2):
+            response = self.client.get(url)
+        self.assertNotContains(response, "ingredients-TOTAL_FORMS")
+        self.assertContains(response, f"?recipe__id__exact={self.recipe.pk}")
+        ingredients = self.client.get(
+            reverse("admin:planner_ingredient_changelist"), {"recipe__id__exact": self.recipe.pk}
+        )
+        self.assertContains(ingredients, "Spice 2")
+
+
+# ---------- Query budgets ----------
+
+# Every planner URL, with the exact number of queries it may run. Each is
+# checked at two data scales, so a count that grows with the number of
+# rows (an N+1) fails even if it is still under budget at the small one.
+#
+# (url name, method, url kwargs, POST data, budget)
+# kwargs and data are callables taking the QueryBudgetTests instance.
+QUERY_BUDGETS = [
+    ("home", "get", None, None, 0),
+    ("recipe_list", "get", None, None, 1),
+    ("recipe_create", "get", None, None, 0),
+    ("recipe_create", "post", None, lambda t: t.recipe_form_data(), 11),
+    ("recipe_detail", "get", lambda t: {"pk": t.recipe.pk}, None, 3),
+    ("recipe_edit", "get", lambda t: {"pk": t.recipe.pk}, None, 2),
+    (
+        "recipe_edit", "post", lambda t: {"pk": t.spare_recipe().pk},
+        lambda t: t.recipe_form_data(t.spare), 15,
+    ),
+    ("recipe_pdf", "get", lambda t: {"pk": t.recipe.pk}, None, 2),
+    ("mealplan_week_list", "get", None, None, 2),
+    ("mealplan_week_create", "get", None, None, 0),
+    ("mealplan_week_create", "post", None, lambda t: {"label": "New week"}, 1),
+    ("mealplan_week_detail", "get", lambda t: {"pk": t.week.pk}, None, 3),
+    (
+        "mealplan_week_autobuild", "get", lambda t: {"pk": t.week.pk},
+        lambda t: {"explain": "1"}, 12,
+    ),
+    ("mealplan_week_autobuild", "post", lambda t: {"pk": t.spare_week().pk}, None, 19),
+    ("mealplan_week_archive", "post", lambda t: {"pk": t.spare_week().pk}, None, 9),
+    ("mealplan_week_unarchive", "post", lambda t: {"pk": t.archived_week().pk}, None, 9),
+    ("mealplan_week_delete", "post", lambda t: {"pk": t.spare_week().pk}, None, 6),
+    ("mealplan_week_clone", "get", lambda t: {"pk": t.week.pk}, None, 5),
+    (
+        "mealplan_week_clone", "post", lambda t: {"pk": t.week.pk},
+        lambda t: t.clone_form_data(), 10,
+    ),
+    (
+        "mealplan_week_save_template", "post", lambda t: {"pk": t.week.pk},
+        lambda t: {"name": f"Template {t.scale}"}, 7,
+    ),
+    ("plan_template_list", "get", None, None, 1),
+    ("plan_template_apply", "get", lambda t: {"pk": t.template.pk}, None, 5),
+    (
+        "plan_template_apply", "post", lambda t: {"pk": t.template.pk},
+        lambda t: {"weeks": t.week_pks()[:2], "replace": "on", "new_weeks": 0}, 8,
+    ),
+    ("plan_template_delete", "post", lambda t: {"pk": t.spare_template().pk}, None, 3),
+    ("planned_meal_toggle_skip", "post", lambda t: {"pk": t.meal.pk}, None, 3),
+    ("planned_meal_create", "get", lambda t: {"week_pk": t.week.pk}, None, 2),
+    (
+        "planned_meal_create", "post", lambda t: {"week_pk": t.week.pk},
+        lambda t: {"slot_name": "Extras", "recipe": t.recipe.pk}, 4,
+    ),
+    ("planned_meal_edit", "get", lambda t: {"pk": t.meal.pk}, None, 3),
+    (
+        "planned_meal_edit", "post", lambda t: {"pk": t.meal.pk},
+        lambda t: {"slot_name": "Lunch", "recipe": t.recipe.pk}, 4,
+    ),
+    ("planned_meal_delete", "post", lambda t: {"pk": t.spare_meal().pk}, None, 3),
+    ("shopping_list", "get", None, None, 1),
+    ("shopping_list", "post", None, lambda t: {"weeks": t.week_pks()}, 11),
+    # Reuses the unchanged snapshot the entry above just made.
+    ("shopping_list_pdf", "post", None, lambda t: {"weeks": t.week_pks()}, 7),
+    (
+        "shopping_list_pdf", "post", None,
+        lambda t: {"snapshot": t.snapshot.pk, "items": t.snapshot_item_pks()[::2]}, 7,
+    ),
+    ("shopping_list_snapshot", "get", lambda t: {"pk": t.snapshot.pk}, None, 3),
+    (
+        "shopping_list_snapshot", "post", lambda t: {"pk": t.snapshot.pk},
+        lambda t: {"items": t.snapshot_item_pks()[1::2]}, 5,
+    ),
+    ("shopping_list_snapshot_pdf", "get", lambda t: {"pk": t.snapshot.pk}, None, 3),
+    (
+        "shopping_list_snapshot", "post", lambda t: {"pk": t.spare_snapshot().pk},
+        lambda t: {"items": t.snapshot_item_pks(t.spare), "purchased": "1"}, 12,
+    ),
+    ("pantry", "get", None, None, 1),
+    ("pantry", "post", None, lambda t: t.pantry_form_data(), 9),
+]
+
+# Rows added per step: recipes per meal type, and weeks.
+DATA_SCALES = [3, 30]
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        use_temporary_pdf_store(self)
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def add_rows(self, count):
+        """
+        Grow the dataset by `count` recipes per meal type (three
+        ingredients each) and `count` fully planned weeks.
+        """
+        recipes = Recipe.objects.bulk_create(
+            Recipe(name=f"{meal_type} {self.scale}.{i}", meal_type=meal_type, course_count=4)
+            for meal_type, _ in MEAL_TYPES
+            for i in range(count)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=recipe, name=f"{category} for {recipe.name}", amount="1", category=category)
+            for recipe in recipes
+            for category in ("produce", "pantry", "protein")
+        )
+        weeks = MealPlanWeek.objects.bulk_create(
+            MealPlanWeek(label=f"Week {self.scale}.{i}") for i in range(count)
+        )
+        PlannedMeal.objects.bulk_create(
+            PlannedMeal(week=week, slot_name=f"Slot {j}", recipe=recipes[(i + j) % len(recipes)])
+            for i, week in enumerate(weeks)
+            for j in range(4)
+        )
+
+    def spare_week(self):
+        """
+        A planned week the request may change or delete.
+        """
+        week = MealPlanWeek.objects.create(label="Spare")
+        PlannedMeal.objects.bulk_create(
+            PlannedMeal(week=week, slot_name=f"Slot {j}", recipe=self.recipe) for j in range(4)
+        )
+        return week
+
+    def spare_recipe(self):
+        """
+        A recipe with three ingredients for the edit form to post back.
+        Model formsets look up each existing row separately, so the
+        ingredient count has to stay fixed across scales.
+        """
+        self.spare = Recipe.objects.create(name=f"Spare {self.scale}", course_count=4)
+        Ingredient.objects.bulk_create(
+            Ingredient(recipe=self.spare, name=name, category="pantry")
+            for name in ("Flour", "Sugar", "Eggs")
+        )
+        return self.spare
+
+    def archived_week(self):
+        week = self.spare_week()
+        archive_weeks([week.pk])
+        return week
+
+    def clone_form_data(self):
+        # Recipes whose last_used is already later are not rewritten, so
+        # start every scale from the same state.
+        Recipe.objects.update(last_used=None)
+        return {
+            "weeks": self.week_pks()[:2],
+            "new_weeks": 4,
+            "first_start_date": "2026-01-05",
+            "update_last_used": "on",
+        }
+
+    def spare_template(self):
+        return save_as_template(self.week, f"Spare {self.scale}")
+
+    def spare_meal(self):
+        return PlannedMeal.objects.create(week=self.week, slot_name="Spare", recipe=self.recipe)
+
+    def week_pks(self):
+        return list(MealPlanWeek.objects.values_list("pk", flat=True))
+
+    def snapshot_item_pks(self, snapshot=None):
+        return list((snapshot or self.snapshot).items.values_list("pk", flat=True))
+
+    def spare_snapshot(self):
+        # Restocking updates names already in the pantry and inserts the
+        # rest; start from an empty pantry so both scales take one path.
+        PantryItem.objects.all().delete()
+        self.spare = create_shopping_list_snapshot(self.week_pks())
+        return self.spare
+
+    def pantry_form_data(self):
+        # Like the recipe formset, each existing row is looked up (and
+        # checked for uniqueness) on its own, so keep the pantry size fixed.
+        PantryItem.objects.all().delete()
+        items = PantryItem.objects.bulk_create(
+            PantryItem(name=name, quantity=1) for name in ("rice", "oats", "flour")
+        )
+        data = {
+            "form-TOTAL_FORMS": len(items) + 1,
+            "form-INITIAL_FORMS": len(items),
+            "form-MIN_NUM_FORMS": 0,
+            "form-MAX_NUM_FORMS": 1000,
+            f"form-{len(items)}-name": f"stock {self.scale}",
+            f"form-{len(items)}-quantity": 2,
+        }
+        for i, item in enumerate(items):
+            data[f"form-{i}-id"] = item.pk
+            data[f"form-{i}-name"] = item.name
+            data[f"form-{i}-category"] = item.category
+            data[f"form-{i}-quantity"] = item.quantity
+        return data
+
+    def recipe_form_data(self, recipe=None):
+        ingredients = list(recipe.ingredients.all()) if recipe else []
+        data = {
+            "name": recipe.name if recipe else f"New recipe {self.scale}",
+            "course_count": 4,
+            "meal_type": "other",
+            "source_note": "",
+            "ingredients-TOTAL_FORMS": len(ingredients) + 1,
+            "ingredients-INITIAL_FORMS": len(ingredients),
+            "ingredients-MIN_NUM_FORMS": 0,
+            "ingredients-MAX_NUM_FORMS": 1000,
+            f"ingredients-{len(ingredients)}-name": "Salt",
+            f"ingredients-{len(ingredients)}-category": "pantry",
+        }
+        for i, ing in enumerate(ingredients):
+            data[f"ingredients-{i}-id"] = ing.pk
+            data[f"ingredients-{i}-name"] = ing.name
+            data[f"ingredients-{i}-amount"] = ing.amount
+            data[f"ingredients-{i}-category"] = ing.category
+        return data
+
+    def test_every_url_has_a_budget(self):
+        urls = {
+            pattern.name for pattern in get_resolver("planner.urls").url_patterns
+        }
+        self.assertEqual(urls - {entry[0] for entry in QUERY_BUDGETS}, set())
+
+    def test_query_budgets(self):
+        for self.scale, count in enumerate(DATA_SCALES):
+            self.add_rows(count)
+            self.recipe = Recipe.objects.order_by("pk").first()
+            self.week = MealPlanWeek.objects.order_by("pk").first()
+            self.meal = self.week.meals.order_by("pk").first()
+            self.snapshot = create_shopping_list_snapshot(self.week_pks())
+            self.template = save_as_template(self.week, f"Template for {count}")
+
+            for name, method, kwargs, data, budget in QUERY_BUDGETS:
+                url = reverse(f"planner:{name}", kwargs=kwargs(self) if kwargs else None)
+                payload = data(self) if data else {}
+                with self.subTest(url=name, method=method, rows=count):
+                    cache.clear()
+                    with self.assertNumQueries(budget):
+                        getattr(self.client, method)(url, payload)
@@ -20,6 +20,17 @@ urlpatterns = [
    path("mealplans/<int:pk>/archive/", views.mealplan_week_archive, name="mealplan_week_archive"),
    path("mealplans/<int:pk>/unarchive/", views.mealplan_week_unarchive, name="mealplan_week_unarchive"),
    path("mealplans/<int:pk>/delete/", views.mealplan_week_delete, name="mealplan_week_delete"),
+   path("mealplans/<int:pk>/clone/", views.mealplan_week_clone, name="mealplan_week_clone"),
+   path(
+       "mealplans/<int:pk>/save-template/",
+       views.mealplan_week_save_template,
+       name="mealplan_week_save_template",
+   ),
+
+   # Plan templates
+   path("templates/", views.plan_template_list, name="plan_template_list"),
+   path("templates/<int:pk>/apply/", views.plan_template_apply, name="plan_template_apply"),
+   path("templates/<int:pk>/delete/", views.plan_template_delete, name="plan_template_delete"),
 
       # Toggle skip on individual meals
    path(
@@ -48,6 +59,11 @@ urlpatterns = [
    # Shopping List
    path("shopping-list/", views.shopping_list, name="shopping_list"),
    path("shopping-list/pdf/", views.shopping_list_pdf, name="shopping_list_pdf"),
+   path("shopping-list/<int:pk>/", views.shopping_list_snapshot, name="shopping_list_snapshot"),
+   path("shopping-list/<int:pk>/pdf/", views.shopping_list_snapshot_pdf, name="shopping_list_snapshot_pdf"),
+
+   # Pantry
+   path("pantry/", views.pantry, name="pantry"),
 ]
 
 
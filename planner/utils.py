@@ -1,16 +1,27 @@
 from io import BytesIO
 
 from django.template.loader import get_template
-from xhtml2pdf import pisa
 
+from .pdfstore import pdf_key, read_pdf, write_pdf
 
-def render_to_pdf(template_src, context):
+
+def load_pdf_stack():
+    """
+    Import xhtml2pdf (and reportlab with it) on first use rather than at
+    module load; it costs around a second and most requests never make a PDF.
+    Call it at startup in workers that do export PDFs to pay that cost early.
     """
-    Render a Django template to PDF bytes using xhtml2pdf.
+    from xhtml2pdf import pisa
+
+    return pisa
+
+
+def html_to_pdf(html):
+    """
+    Convert HTML to PDF bytes using xhtml2pdf.
     Returns bytes on success, or None on error.
     """
-    template = get_template(template_src)
-    html = template.render(context)
+    pisa = load_pdf_stack()
     result = BytesIO()
 
     pdf = pisa.CreatePDF(html, dest=result)
@@ -19,3 +30,24 @@ def render_to_pdf(template_src, context):
 
     return result.getvalue()
 
+
+def render_to_pdf(template_src, context):
+    """
+    Render a Django template to PDF bytes, converting the HTML only if the
+    PDF store does not already hold it (see planner/pdfstore.py).
+    Returns bytes on success, or None on error.
+    """
+    template = get_template(template_src)
+    html = template.render(context)
+    key = pdf_key(html)
+
+    pdf_bytes = read_pdf(key)
+    if pdf_bytes is None:
+        pdf_bytes = html_to_pdf(html)
+        if pdf_bytes is not None:
+            try:
+                write_pdf(key, pdf_bytes)
+            except OSError:
+                pass  # the store only saves work; still serve the PDF
+
+    return pdf_bytes
@@ -1,13 +1,39 @@
+from django import forms
 from django.conf import settings
-from django.forms import modelform_factory, inlineformset_factory
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.forms import modelform_factory, modelformset_factory, inlineformset_factory
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Recipe, Ingredient, MealPlanWeek, PlannedMeal, INGREDIENT_CATEGORIES
-from datetime import date, timedelta
+from .models import (
+    Recipe,
+    Ingredient,
+    MealPlanWeek,
+    ArchivedWeek,
+    PlanTemplate,
+    PlannedMeal,
+    PantryItem,
+    ShoppingListSnapshot,
+    ShoppingListItem,
+    INGREDIENT_CATEGORIES,
+)
 from django.views.decorators.http import require_POST
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
+from .archive import archive_weeks, unarchive_weeks, unpack_meals
+from .autobuild import autobuild_week, explain_week
+from .caching import cache_response
+from .cloning import apply_slots, new_weeks, save_as_template, template_slots, week_slots
+from .dedupe import find_similar, save_signatures
+from .pantry import mark_purchased, shopping_items
+from .similar import similar_recipes
 from .utils import render_to_pdf
 
 
+# Rendered shopping-list PDFs are cached per snapshot version.
+SHOPPING_LIST_PDF_CACHE_TIMEOUT = 60 * 60 * 24
+
+
 # ---------- Forms ----------
 
 RecipeForm = modelform_factory(
@@ -34,9 +60,76 @@ PlannedMealForm = modelform_factory(
 )
 
 
+class PantryItemForm(forms.ModelForm):
+    """
+    Pantry names are lowercased before the uniqueness check, so "Rice"
+    next to "rice" is a form error rather than a failed INSERT.
+    """
+    class Meta:
+        model = PantryItem
+        fields = ["name", "category", "quantity"]
+
+    def clean_name(self):
+        return self.cleaned_data["name"].strip().lower()
+
+
+PantryFormSet = modelformset_factory(
+    PantryItem,
+    form=PantryItemForm,
+    extra=5,
+    can_delete=True,
+)
+
+
+class ApplyPlanForm(forms.Form):
+    """
+    Targets for cloning a week or applying a plan template.
+    """
+    weeks = forms.ModelMultipleChoiceField(
+        queryset=MealPlanWeek.objects.filter(archived=False).order_by("start_date", "id"),
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        label="Existing weeks",
+    )
+    new_weeks = forms.IntegerField(
+        min_value=0, max_value=52, initial=0, required=False,
+        label="New weeks to create",
+    )
+    first_start_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}),
+        label="First new week starts",
+    )
+    replace = forms.BooleanField(required=False, label="Replace meals already in existing weeks")
+    update_last_used = forms.BooleanField(required=False, initial=True, label="Mark these recipes as used")
+
+    def clean(self):
+        cleaned = super().clean()
+        new_weeks = cleaned.get("new_weeks") or 0
+        if new_weeks and not cleaned.get("first_start_date"):
+            self.add_error("first_start_date", "Pick a start date for the new weeks.")
+        if not new_weeks and not cleaned.get("weeks"):
+            raise forms.ValidationError("Choose at least one week, or create new ones.")
+        return cleaned
+
+
 
 # ---------- Views ----------
 
+def check_for_duplicates(request, recipe):
+    """
+    Refresh the recipe's duplicate-detection signature and flag likely
+    duplicates (same dish, different name) after a save.
+    """
+    names = [ing.name for ing in recipe.ingredients.all()]
+    save_signatures({recipe: names})
+    for other, score in find_similar(names, exclude_pk=recipe.pk)[:3]:
+        messages.warning(
+            request,
+            f'This looks like "{other.name}": about {score:.0%} of the ingredients match.',
+        )
+
+
 def home(request):
     greeting = getattr(settings, "MEALPREP_GREETING", "Hello, wife!")
     return render(request, "planner/home.html", {"greeting": greeting})
@@ -60,6 +153,7 @@ def recipe_create(request):
                 recipe = form.save()
                 formset.instance = recipe
                 formset.save()
+                check_for_duplicates(request, recipe)
                 return redirect("planner:recipe_detail", pk=recipe.pk)
     else:
         form = RecipeForm()
@@ -75,9 +169,14 @@ def recipe_create(request):
 
 
 
+@cache_response("recipe", "ingredient", "recipeneighbor")
 def recipe_detail(request, pk):
     recipe = get_object_or_404(Recipe, pk=pk)
-    return render(request, "planner/recipe_detail.html", {"recipe": recipe})
+    return render(
+        request,
+        "planner/recipe_detail.html",
+        {"recipe": recipe, "similar": similar_recipes(recipe.pk)},
+    )
 
 def recipe_edit(request, pk):
     recipe = get_object_or_404(Recipe, pk=pk)
@@ -90,6 +189,7 @@ def recipe_edit(request, pk):
             recipe = form.save()
             formset.instance = recipe
             formset.save()
+            check_for_duplicates(request, recipe)
             return redirect("planner:recipe_detail", pk=recipe.pk)
     else:
         form = RecipeForm(instance=recipe)
@@ -105,6 +205,7 @@ def recipe_edit(request, pk):
     return render(request, "planner/recipe_form.html", context)
 
 
+@cache_response("recipe")
 def recipe_list(request):
     recipes = Recipe.objects.all().order_by("name")
     return render(request, "planner/recipe_list.html", {"recipes": recipes})
@@ -113,6 +214,7 @@ def recipe_list(request):
 #    weeks = MealPlanWeek.objects.order_by("-start_date", "-id")
 #    return render(request, "planner/mealplan_week_list.html", {"weeks": weeks})
 
+@cache_response("mealplanweek")
 def mealplan_week_list(request):
     active_weeks = MealPlanWeek.objects.filter(archived=False).order_by("-start_date", "-id")
     archived_weeks = MealPlanWeek.objects.filter(archived=True).order_by("-start_date", "-id")
@@ -137,97 +239,146 @@ def mealplan_week_create(request):
 
     return render(request, "planner/mealplan_week_form.html", {"form": form})
 
+@cache_response("mealplanweek", "plannedmeal", "recipe", "archivedweek")
 def mealplan_week_detail(request, pk):
     week = get_object_or_404(MealPlanWeek, pk=pk)
     meals = week.meals.select_related("recipe").all().order_by("slot_name")
+
+    # Archived weeks keep their meals in cold storage; show them read-only.
+    archived_meals = []
+    if week.archived:
+        stored = ArchivedWeek.objects.filter(week=week).first()
+        if stored is not None:
+            archived_meals = unpack_meals(stored.data)
+
     return render(
         request,
         "planner/mealplan_week_detail.html",
-        {"week": week, "meals": meals, "recipes": Recipe.objects.order_by("name")},
+        {
+            "week": week,
+            "meals": meals,
+            "archived_meals": archived_meals,
+            "recipes": Recipe.objects.order_by("name"),
+        },
     )
 
 def mealplan_week_autobuild(request, pk):
     week = get_object_or_404(MealPlanWeek, pk=pk)
 
+    # GET ?explain=1 previews the picks, and why, without changing anything.
+    if request.method == "GET" and request.GET.get("explain"):
+        report = explain_week(week.pk)
+        return render(
+            request,
+            "planner/autobuild_explain.html",
+            {"week": week, "report": report},
+        )
+
     if request.method != "POST":
         return redirect("planner:mealplan_week_detail", pk=week.pk)
 
-    # If the week is marked as skipped, just go back without doing anything.
-    if week.skipped:
+    # If the week is marked as skipped or archived, just go back without doing anything.
+    if week.skipped or week.archived:
         return redirect("planner:mealplan_week_detail", pk=week.pk)
 
-    # Clear any existing planned meals for a clean rebuild.
-    week.meals.all().delete()
-
-    # Determine the reference date for "last used"
-    reference_date = week.start_date or date.today()
-    cutoff = reference_date - timedelta(days=30)
-
-    chosen_ids = set()
-
-    def pick_recipe(meal_type, course_count):
-        qs = Recipe.objects.filter(
-            meal_type=meal_type,
-            course_count=course_count,
-        ).exclude(
-            last_used__gte=cutoff
-        ).exclude(
-            id__in=chosen_ids
-        ).order_by("last_used", "name")
-
-        recipe = qs.first()
-        if recipe is None:
-            # Fallback: ignore last_used / duplicates if needed
-            qs = Recipe.objects.filter(
-                meal_type=meal_type,
-                course_count=course_count,
-            ).exclude(
-                id__in=chosen_ids
-            ).order_by("name")
-            recipe = qs.first()
-
-        if recipe is not None:
-            chosen_ids.add(recipe.id)
-        return recipe
-
-    # Define the slots we want
-    slots = [
-        ("Lunch", "lunch", 8),
-        ("Vegetarian Dinner", "vegetarian", 4),
-        ("Protein Dinner", "protein", 4),
-        ("Seafood Dinner", "seafood", 2),
-    ]
-
-    created_meals = []
-
-    for slot_name, meal_type, course_count in slots:
-        recipe = pick_recipe(meal_type, course_count)
-        if recipe is not None:
-            PlannedMeal.objects.create(
-                week=week,
-                slot_name=slot_name,
-                recipe=recipe,
-            )
-            # Update last_used
-            recipe.last_used = reference_date
-            recipe.save(update_fields=["last_used"])
-            created_meals.append(recipe)
+    autobuild_week(week.pk)
 
     return redirect("planner:mealplan_week_detail", pk=week.pk)
 
+def apply_plan(request, slots, source_label, exclude_week=None):
+    """
+    Shared GET/POST handling for cloning a week and applying a template.
+    """
+    if request.method == "POST":
+        form = ApplyPlanForm(request.POST)
+        if form.is_valid():
+            weeks = form.cleaned_data["weeks"]
+            if exclude_week is not None:
+                weeks = weeks.exclude(pk=exclude_week.pk)
+            count = form.cleaned_data["new_weeks"] or 0
+            targets = apply_slots(
+                slots,
+                weeks,
+                create=new_weeks(count, form.cleaned_data["first_start_date"]) if count else [],
+                replace=form.cleaned_data["replace"],
+                update_last_used=form.cleaned_data["update_last_used"],
+            )
+            messages.success(request, f"Added {source_label} to {len(targets)} week(s).")
+            return redirect("planner:mealplan_week_list")
+    else:
+        form = ApplyPlanForm()
+
+    if exclude_week is not None:
+        form.fields["weeks"].queryset = form.fields["weeks"].queryset.exclude(pk=exclude_week.pk)
+
+    recipe_names = dict(
+        Recipe.objects.filter(pk__in={recipe_id for _, recipe_id, _ in slots}).values_list("pk", "name")
+    )
+    context = {
+        "form": form,
+        "source_label": source_label,
+        "slots": [
+            {"slot_name": slot_name, "recipe_name": recipe_names.get(recipe_id, "?"), "skipped": skipped}
+            for slot_name, recipe_id, skipped in slots
+        ],
+    }
+    return render(request, "planner/plan_apply_form.html", context)
+
+
+def mealplan_week_clone(request, pk):
+    """
+    Copy a week's meals onto other weeks, existing or new.
+    """
+    week = get_object_or_404(MealPlanWeek, pk=pk)
+    return apply_plan(request, week_slots(week), week.label, exclude_week=week)
+
+
+@require_POST
+def mealplan_week_save_template(request, pk):
+    week = get_object_or_404(MealPlanWeek, pk=pk)
+    name = request.POST.get("name", "").strip()[:100]
+
+    if not name:
+        messages.error(request, "Give the template a name.")
+        return redirect("planner:mealplan_week_detail", pk=week.pk)
+    if PlanTemplate.objects.filter(name__iexact=name).exists():
+        messages.error(request, f'A template called "{name}" already exists.')
+        return redirect("planner:mealplan_week_detail", pk=week.pk)
+
+    save_as_template(week, name)
+    return redirect("planner:plan_template_list")
+
+
+def plan_template_list(request):
+    templates = PlanTemplate.objects.annotate(slot_count=Count("slots")).order_by("name")
+    return render(request, "planner/plan_template_list.html", {"templates": templates})
+
+
+def plan_template_apply(request, pk):
+    template = get_object_or_404(PlanTemplate, pk=pk)
+    return apply_plan(request, template_slots(template), template.name)
+
+
+@require_POST
+def plan_template_delete(request, pk):
+    template = get_object_or_404(PlanTemplate, pk=pk)
+    template.delete()
+    return redirect("planner:plan_template_list")
+
+
 @require_POST
 def mealplan_week_archive(request, pk):
     week = get_object_or_404(MealPlanWeek, pk=pk)
-    week.archived = True
-    week.save(update_fields=["archived"])
+    # Moves the week's meals to cold storage
+    archive_weeks([week.pk])
     return redirect("planner:mealplan_week_list")
 
 
 @require_POST
 def mealplan_week_unarchive(request, pk):
     week = get_object_or_404(MealPlanWeek, pk=pk)
-    week.archived = False
-    week.save(update_fields=["archived"])
+    # Brings the week's meals back from cold storage
+    unarchive_weeks([week.pk])
     return redirect("planner:mealplan_week_list")
 
 
@@ -250,6 +401,10 @@ def planned_meal_create(request, week_pk):
     """
     week = get_object_or_404(MealPlanWeek, pk=week_pk)
 
+    # Archived weeks keep their meals in cold storage; unarchive to change them.
+    if week.archived:
+        return redirect("planner:mealplan_week_detail", pk=week.pk)
+
     if request.method == "POST":
         form = PlannedMealForm(request.POST)
         if form.is_valid():
@@ -262,10 +417,20 @@ def planned_meal_create(request, week_pk):
         initial_slot = request.GET.get("slot_name", "")
         form = PlannedMealForm(initial={"slot_name": initial_slot})
 
+    # Optional: ?like=<recipe id> pre-selects a recipe and suggests similar ones
+    like = None
+    like_pk = request.GET.get("like", "")
+    if request.method != "POST" and like_pk.isdigit():
+        like = Recipe.objects.filter(pk=like_pk).first()
+        if like is not None:
+            form.initial["recipe"] = like.pk
+
     context = {
         "form": form,
         "week": week,
         "title": "Add meal to week",
+        "like": like,
+        "similar": similar_recipes(like.pk) if like else [],
     }
     return render(request, "planner/planned_meal_form.html", context)
 
@@ -274,7 +439,7 @@ def planned_meal_edit(request, pk):
     """
     Change the recipe (or slot name) for an existing planned meal.
     """
-    meal = get_object_or_404(PlannedMeal, pk=pk)
+    meal = get_object_or_404(PlannedMeal.objects.select_related("week", "recipe"), pk=pk)
     if request.method == "POST":
         form = PlannedMealForm(request.POST, instance=meal)
         if form.is_valid():
@@ -288,6 +453,8 @@ def planned_meal_edit(request, pk):
         "week": meal.week,
         "meal": meal,
         "title": "Edit planned meal",
+        "like": meal.recipe,
+        "similar": similar_recipes(meal.recipe_id),
     }
     return render(request, "planner/planned_meal_form.html", context)
 
@@ -303,66 +470,122 @@ def planned_meal_delete(request, pk):
     return redirect("planner:mealplan_week_detail", pk=week_pk)
 
 
+def unchanged_snapshot(week_ids, items):
+    """
+    The latest snapshot of exactly these weeks that nobody has checked,
+    unchecked or purchased from, if it still holds exactly `items`.
+    """
+    snapshot = (
+        ShoppingListSnapshot.objects.filter(version=1, purchased_at__isnull=True)
+        .annotate(
+            week_count=Count("weeks", distinct=True),
+            matching=Count("weeks", filter=Q(weeks__in=week_ids), distinct=True),
+        )
+        .filter(week_count=len(week_ids), matching=len(week_ids))
+        .order_by("-pk")
+        .first()
+    )
+    if snapshot is None:
+        return None
+    stored = list(snapshot.items.values_list("category", "label", "name", "quantity"))
+    wanted = [(i["category"], i["label"], i["name"], i["quantity"]) for i in items]
+    return snapshot if stored == wanted else None
+
+
+def create_shopping_list_snapshot(week_ids):
+    """
+    Build the shopping list for the given weeks, less what the pantry
+    already covers, and persist it as a snapshot. Regenerating a list
+    that has not changed returns the existing snapshot instead.
+    """
+    week_ids = {int(i) for i in week_ids if str(i).isdigit()}
+    items = shopping_items(week_ids)
+    with transaction.atomic():
+        snapshot = unchanged_snapshot(week_ids, items)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = ShoppingListSnapshot.objects.create()
+        snapshot.weeks.set(MealPlanWeek.objects.filter(pk__in=week_ids))
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                snapshot=snapshot,
+                category=item["category"],
+                label=item["label"],
+                name=item["name"],
+                quantity=item["quantity"],
+                position=i,
+            )
+            for i, item in enumerate(items)
+        )
+    return snapshot
+
+
+def shopping_list_pdf_context(weeks, ingredients_by_category):
+    """
+    Also used by `manage.py prerenderpdfs`, whose HTML must match this
+    view's byte for byte to hit the PDF store.
+    """
+    # Column layout for the PDF:
+    # Left side: Produce, Protein, Frozen (your half)
+    # Right side: Pantry, Dairy, plus any other categories
+    left_categories = ["produce", "protein", "frozen"]
+    right_categories = [key for key, _ in INGREDIENT_CATEGORIES if key not in left_categories]
+
+    return {
+        "weeks": weeks,
+        "ingredients_by_category": ingredients_by_category,
+        "category_labels": dict(INGREDIENT_CATEGORIES),
+        "left_categories": left_categories,
+        "right_categories": right_categories,
+    }
+
+
+def shopping_list_pdf_response(snapshot):
+    """
+    PDF download for a snapshot. Rendered output is cached per snapshot
+    version, so reprints are free until the checked items change.
+    """
+    cache_key = f"planner:shopping_list_pdf:{snapshot.pk}:{snapshot.version}"
+    pdf_bytes = cache.get(cache_key)
+
+    if pdf_bytes is None:
+        context = shopping_list_pdf_context(
+            snapshot.weeks.order_by("start_date", "id"),
+            snapshot.items_by_category(checked_only=True),
+        )
+        pdf_bytes = render_to_pdf("planner/shopping_list_pdf.html", context)
+        if pdf_bytes is None:
+            return HttpResponse("Error generating PDF", status=500)
+        cache.set(cache_key, pdf_bytes, SHOPPING_LIST_PDF_CACHE_TIMEOUT)
+
+    response = HttpResponse(pdf_bytes, content_type="application/pdf")
+    response["Content-Disposition"] = 'attachment; filename="shopping_list.pdf"'
+    return response
+
+
 def shopping_list(request):
    #weeks = MealPlanWeek.objects.order_by("start_date", "id")
     weeks = MealPlanWeek.objects.filter(archived=False).order_by("start_date", "id")
     selected_week_ids = []
     ingredients_by_category = {}
     category_labels = dict(INGREDIENT_CATEGORIES)
+    snapshot = None
 
     if request.method == "POST":
         # Get selected week IDs from checkboxes
         selected_week_ids = request.POST.getlist("weeks")
 
         if selected_week_ids:
-            # Fetch only non-skipped weeks
-            selected_weeks = MealPlanWeek.objects.filter(
-                pk__in=selected_week_ids,
-                skipped=False,
-                archived=False,
-            )
-
-            # All non-skipped meals in those weeks
-            meals = (
-                PlannedMeal.objects.filter(
-                    week__in=selected_weeks,
-                    skipped=False,
-                )
-                .select_related("recipe", "week")
-                .prefetch_related("recipe__ingredients")
-            )
-
-            # Prepare structure: category -> list of items
-            ingredients_by_category = {key: [] for key, _ in INGREDIENT_CATEGORIES}
-            seen = set()  # avoid exact duplicates
-
-            for meal in meals:
-                for ing in meal.recipe.ingredients.all():
-                    cat = ing.category
-                    name = ing.name.strip()
-                    amount = (ing.amount or "").strip()
-
-                    key = (cat, name, amount)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-
-                    if amount:
-                        label = f"{amount} – {name}"
-                    else:
-                        label = name
-
-                    if cat in ingredients_by_category:
-                        ingredients_by_category[cat].append(label)
-                    else:
-                        # Fallback in case of unexpected category
-                        ingredients_by_category.setdefault(cat, []).append(label)
+            snapshot = create_shopping_list_snapshot(selected_week_ids)
+            ingredients_by_category = snapshot.items_by_category()
 
     context = {
         "weeks": weeks,
         "selected_week_ids": selected_week_ids,
         "ingredients_by_category": ingredients_by_category,
         "category_labels": category_labels,
+        "snapshot": snapshot,
     }
     return render(request, "planner/shopping_list.html", context)
 
@@ -371,98 +594,67 @@ def shopping_list_pdf(request):
         # PDF export only makes sense from the form submission
         return redirect("planner:shopping_list")
 
-    # Items the user kept checked on the shopping list page
-    raw_items = request.POST.getlist("items")
-
-    # Weeks (used for PDF header and fallback behaviour)
-    selected_week_ids = request.POST.getlist("weeks")
-    selected_weeks = MealPlanWeek.objects.filter(
-        pk__in=selected_week_ids
-    ).order_by("start_date", "id")
-
-    ingredients_by_category = {key: [] for key, _ in INGREDIENT_CATEGORIES}
-    category_labels = dict(INGREDIENT_CATEGORIES)
-
-    if raw_items:
-        # Use the filtered items from the shopping-list page.
-        # Each value is "category_key|||label"
-        for raw in raw_items:
-            try:
-                cat_key, label = raw.split("|||", 1)
-            except ValueError:
-                # Ignore malformed values
-                continue
-
-            if cat_key in ingredients_by_category:
-                ingredients_by_category[cat_key].append(label)
-            else:
-                ingredients_by_category.setdefault(cat_key, []).append(label)
+    snapshot_id = request.POST.get("snapshot")
+    if snapshot_id:
+        if not snapshot_id.isdigit():
+            raise Http404("No such shopping list.")
+        # Items the user kept checked on the shopping list page, by item id
+        snapshot = get_object_or_404(ShoppingListSnapshot, pk=snapshot_id)
+        snapshot.set_checked(request.POST.getlist("items"))
     else:
-        # Fallback: old behavior – recompute from the selected weeks
+        # No list generated yet – build one from the selected weeks
+        selected_week_ids = request.POST.getlist("weeks")
         if not selected_week_ids:
             # No weeks selected; send back to the normal page
             return redirect("planner:shopping_list")
+        snapshot = create_shopping_list_snapshot(selected_week_ids)
 
-        # Fetch only non-skipped weeks
-        selected_weeks = MealPlanWeek.objects.filter(
-            pk__in=selected_week_ids,
-            skipped=False,
-        ).order_by("start_date", "id")
-
-        # All non-skipped meals in those weeks
-        meals = (
-            PlannedMeal.objects.filter(
-                week__in=selected_weeks,
-                skipped=False,
-            )
-            .select_related("recipe", "week")
-            .prefetch_related("recipe__ingredients")
-        )
+    return shopping_list_pdf_response(snapshot)
 
-        seen = set()  # avoid exact duplicates
 
-        for meal in meals:
-            for ing in meal.recipe.ingredients.all():
-                cat = ing.category
-                name = ing.name.strip()
-                amount = (ing.amount or "").strip()
+def shopping_list_snapshot(request, pk):
+    """
+    A saved shopping list, e.g. opened on a phone at the store.
+    Posting the form saves which items are still checked.
+    """
+    snapshot = get_object_or_404(ShoppingListSnapshot, pk=pk)
 
-                key = (cat, name, amount)
-                if key in seen:
-                    continue
-                seen.add(key)
+    if request.method == "POST":
+        snapshot.set_checked(request.POST.getlist("items"))
+        if "purchased" in request.POST:
+            if mark_purchased(snapshot):
+                messages.success(request, "Checked items were added to the pantry.")
+            else:
+                messages.info(request, "This list was already marked as purchased.")
+        return redirect("planner:shopping_list_snapshot", pk=snapshot.pk)
 
-                if amount:
-                    label = f"{amount} – {name}"
-                else:
-                    label = name
+    context = {
+        "snapshot": snapshot,
+        "weeks": snapshot.weeks.order_by("start_date", "id"),
+        "ingredients_by_category": snapshot.items_by_category(),
+        "category_labels": dict(INGREDIENT_CATEGORIES),
+    }
+    return render(request, "planner/shopping_list_snapshot.html", context)
 
-                if cat in ingredients_by_category:
-                    ingredients_by_category[cat].append(label)
-                else:
-                    ingredients_by_category.setdefault(cat, []).append(label)
 
-    # Column layout for the PDF:
-    # Left side: Produce, Protein, Frozen (your half)
-    # Right side: Pantry, Dairy, plus any other categories
-    left_categories = ["produce", "protein", "frozen"]
-    right_categories = [key for key, _ in INGREDIENT_CATEGORIES if key not in left_categories]
+def pantry(request):
+    """
+    Edit what's on hand. Stock here is left off new shopping lists.
+    """
+    if request.method == "POST":
+        formset = PantryFormSet(request.POST)
+        if formset.is_valid():
+            formset.save()
+            return redirect("planner:pantry")
+    else:
+        formset = PantryFormSet()
 
-    context = {
-        "weeks": selected_weeks,
-        "ingredients_by_category": ingredients_by_category,
-        "category_labels": category_labels,
-        "left_categories": left_categories,
-        "right_categories": right_categories,
-    }
+    return render(request, "planner/pantry.html", {"formset": formset})
 
-    pdf_bytes = render_to_pdf("planner/shopping_list_pdf.html", context)
-    if pdf_bytes is None:
-        return HttpResponse("Error generating PDF", status=500)
 
-    response = HttpResponse(pdf_bytes, content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="shopping_list.pdf"'
-    return response
+def shopping_list_snapshot_pdf(request, pk):
+    snapshot = get_object_or_404(ShoppingListSnapshot, pk=pk)
+    return shopping_list_pdf_response(snapshot)
 
 
 def recipe_pdf(request, pk):